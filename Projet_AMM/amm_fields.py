@@ -0,0 +1,69 @@
+# amm_fields.py
+import re
+
+# Labelled fields every AMM attestation must carry: label -> value pattern
+REQUIRED_FIELDS = {
+    'Numéro AMM': r'[A-Z0-9-]+',
+    'Médicament': r'[^\n]+',
+    'Substance Active': r'[^\n]+',
+    'Forme Pharmaceutique': r'[^\n]+',
+    'Date Fabrication': r'\d{4}-\d{2}-\d{2}',
+    'Date Péremption': r'\d{4}-\d{2}-\d{2}',
+    'Fabricant': r'[^\n]+',
+    'Numéro de Lot': r'[^\n]+'
+}
+
+# Fields pdf_generator.py writes that are picked up when present
+OPTIONAL_FIELDS = {
+    "Pays d'Origine": r'[^\n]+',
+    'Conditions de Conservation': r'[^\n]+'
+}
+
+
+class FieldExtractor:
+    def __init__(self, required=REQUIRED_FIELDS, optional=OPTIONAL_FIELDS):
+        """Compile all labelled fields into one alternation regex"""
+        self.required = list(required)
+        self.fields = self.required + [field for field in optional if field not in required]
+        patterns = {**optional, **required}
+
+        # Labels match anywhere, like the separate re.search scans did. Every match
+        # starts at a colon, a literal sre finds fast, and looks back for its label;
+        # values sit in a lookahead so a failed value never hides a later label and
+        # several fields on one line all stay findable. Group i + 1 holds the value
+        # of self.fields[i].
+        for field in self.fields:
+            if any(other != field and other.endswith(field) for other in self.fields):
+                raise ValueError(f"Label {field} ends another label and would be hidden by it")
+        self.pattern = re.compile(':(?:' + '|'.join(
+            rf'(?<={re.escape(field)}:)(?=\s*({patterns[field]}))' for field in self.fields
+        ) + ')')
+
+    def extract(self, text, extracted_data=None):
+        """Add the first value of every field found in text, in a single scan"""
+        if extracted_data is None:
+            extracted_data = {}
+            remaining = len(self.fields)
+        else:
+            remaining = len(self.fields) - sum(1 for field in self.fields if field in extracted_data)
+            if not remaining:
+                return extracted_data
+
+        for match in self.pattern.finditer(text):
+            group = match.lastindex
+            field = self.fields[group - 1]
+            if field not in extracted_data:
+                extracted_data[field] = match.group(group).strip()
+                remaining -= 1
+                if not remaining:
+                    break
+
+        return extracted_data
+
+    def missing(self, extracted_data):
+        """List required fields absent from extracted_data"""
+        return [field for field in self.required if field not in extracted_data]
+
+
+# Shared extractor, compiled once at import
+FIELD_EXTRACTOR = FieldExtractor()
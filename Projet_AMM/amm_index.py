@@ -0,0 +1,343 @@
+# amm_index.py
+# Membership index of registered AMM numbers and used lot numbers. A Bloom filter
+# rejects most unknown identifiers without touching the table; an open-addressing
+# hash table of 64-bit fingerprints answers the rest exactly. Both are .npy files
+# opened memory-mapped, so loading costs a few milliseconds at any size.
+#
+# Size per set at 1% false positives: the Bloom filter takes 1.2 bytes per entry
+# (60 MB for 50M identifiers) and is the only part every lookup touches. The
+# on-disk table takes 10 bytes per entry for AMM numbers (500 MB for 50M) and
+# 15 with the owner tag of lot numbers (750 MB), and its pages are only read
+# for identifiers that pass the filter. Sizes are for an index created with that
+# capacity; appends past it rebuild both parts for 1.5x the new count. See footprint().
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+META_FILE = 'meta.json'
+TABLE_FILE = 'table.npy'
+VALUES_FILE = 'values.npy'
+BLOOM_FILE = 'bloom.npy'
+FORMAT = 2
+
+# Table slots hold a fingerprint, 0 marking an empty slot, and optionally a uint32 value
+MAX_LOAD = 0.8
+MASK64 = (1 << 64) - 1
+
+
+def fingerprint(key):
+    """64-bit hash of an identifier; always odd, so never the empty-slot marker"""
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'little') | 1
+
+
+def fingerprints(keys):
+    """fingerprint() of many identifiers as a uint64 array"""
+    return np.array([fingerprint(key) for key in keys], dtype=np.uint64)
+
+
+def table_slots(capacity):
+    """Slots of a table holding capacity entries at MAX_LOAD"""
+    return max(16, math.ceil(capacity / MAX_LOAD))
+
+
+def bloom_size(capacity, error_rate):
+    """(bits, hash count) of the optimal Bloom filter for capacity entries at error_rate"""
+    bits = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2 / 8) * 8)
+    return bits, max(1, round(bits / capacity * math.log(2)))
+
+
+def footprint(entries, error_rate=0.01, values=False):
+    """(Bloom filter bytes, table bytes) of a set sized for entries identifiers"""
+    bits, _ = bloom_size(entries, error_rate)
+    return bits // 8, table_slots(entries) * (12 if values else 8)
+
+
+class IdentifierIndex:
+    def __init__(self, path, capacity=100_000, error_rate=0.01, create=True, values=False):
+        """Open the index stored in directory path, creating it sized for capacity entries
+
+        values=True keeps a uint32 with every identifier, returned by get().
+        """
+        self.path = path
+        self.error_rate = error_rate
+        if not os.path.isfile(os.path.join(path, META_FILE)):
+            if not create:
+                raise FileNotFoundError(f"No identifier index at {path}")
+            os.makedirs(path, exist_ok=True)
+            empty = np.zeros(0, dtype=np.uint64)
+            self._write_files(empty, np.zeros(0, dtype=np.uint32) if values else None, capacity)
+        self._open()
+
+    def _open(self):
+        with open(os.path.join(self.path, META_FILE)) as f:
+            self.meta = json.load(f)
+        if self.meta.get('format') != FORMAT:
+            raise ValueError(f"Identifier index at {self.path} uses an older format; rebuild it")
+        self.error_rate = self.meta['error_rate']
+        mode = 'r+' if os.access(os.path.join(self.path, TABLE_FILE), os.W_OK) else 'r'
+        self.table = np.load(os.path.join(self.path, TABLE_FILE), mmap_mode=mode)
+        self.values = np.load(os.path.join(self.path, VALUES_FILE), mmap_mode=mode) if self.meta['values'] else None
+        self.bloom = np.load(os.path.join(self.path, BLOOM_FILE), mmap_mode=mode)
+        self._slots = self.table.shape[0]
+        self._bloom_bits = self.meta['bloom_bits']
+        self._bloom_hashes = self.meta['bloom_hashes']
+
+    def __len__(self):
+        return self.meta['count']
+
+    def nbytes(self):
+        """(bloom bytes, table bytes) on disk"""
+        return self.bloom.nbytes, self.table.nbytes + (self.values.nbytes if self.values is not None else 0)
+
+    def might_contain(self, fp):
+        """Bloom filter test of a fingerprint: False proves absence without reading the table"""
+        bloom, bits = self.bloom, self._bloom_bits
+        step = (fp >> 32) | 1
+        for i in range(self._bloom_hashes):
+            bit = ((fp + i * step) & MASK64) % bits
+            if not bloom[bit >> 3] & (1 << (bit & 7)):
+                return False
+        return True
+
+    def _find(self, fp):
+        """Table slot holding fingerprint fp, or None"""
+        if not self.might_contain(fp):
+            return None
+
+        table, slots = self.table, self._slots
+        slot = fp % slots
+        while True:
+            row = table[slot]
+            if row == fp:
+                return slot
+            if row == 0:
+                return None
+            slot = slot + 1 if slot + 1 < slots else 0
+
+    def __contains__(self, key):
+        return self._find(fingerprint(key)) is not None
+
+    def get(self, key, default=None):
+        """Value stored with key, or default when the identifier is not in the index"""
+        if self.values is None:
+            raise TypeError(f"Identifier index at {self.path} stores no values")
+        slot = self._find(fingerprint(key))
+        return default if slot is None else int(self.values[slot])
+
+    def add(self, keys, values=None):
+        """Append identifiers (with uint32 values, when the index keeps them); returns how many were new
+
+        An identifier already in the index keeps its first value.
+        """
+        fps = fingerprints(keys)
+        if not len(fps):
+            return 0
+        if self.values is not None:
+            values = np.zeros(len(fps), dtype=np.uint32) if values is None else np.asarray(values, dtype=np.uint32)
+
+        needed = self.meta['count'] + len(fps)
+        if needed > MAX_LOAD * self._slots or needed > self.meta['bloom_capacity']:
+            # Rebuilt into fresh files sized for the new total, then swapped in
+            used = self.table != 0
+            self._write_files(np.asarray(self.table[used]),
+                              np.asarray(self.values[used]) if self.values is not None else None,
+                              needed * 3 // 2)
+            self._open()
+
+        added = _insert(self.table, self.values, fps, values)
+        _set_bloom_bits(self.bloom, self._bloom_bits, self._bloom_hashes, added)
+        for array in (self.table, self.values, self.bloom):
+            if array is not None:
+                array.flush()
+
+        self.meta['count'] += len(added)
+        self._write_meta(self.meta)
+        return len(added)
+
+    def _write_files(self, fps, values, capacity):
+        """Write a table and Bloom filter holding fps (and values) and sized for capacity entries"""
+        table = np.zeros(table_slots(capacity), dtype=np.uint64)
+        table_values = np.zeros(len(table), dtype=np.uint32) if values is not None else None
+        _insert(table, table_values, fps, values)
+
+        bloom_bits, bloom_hashes = bloom_size(capacity, self.error_rate)
+        bloom = np.zeros(bloom_bits // 8, dtype=np.uint8)
+        _set_bloom_bits(bloom, bloom_bits, bloom_hashes, fps)
+
+        # Readers holding the old files keep a consistent view until they reopen
+        files = [(TABLE_FILE, table), (BLOOM_FILE, bloom)]
+        if table_values is not None:
+            files.append((VALUES_FILE, table_values))
+        for name, array in files:
+            tmp = os.path.join(self.path, name + '.tmp')
+            with open(tmp, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp, os.path.join(self.path, name))
+
+        self._write_meta({
+            'format': FORMAT,
+            'count': len(fps),
+            'values': table_values is not None,
+            'bloom_capacity': int(capacity),
+            'bloom_bits': int(bloom_bits),
+            'bloom_hashes': int(bloom_hashes),
+            'error_rate': self.error_rate
+        })
+
+    def _write_meta(self, meta):
+        tmp = os.path.join(self.path, META_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, META_FILE))
+
+
+def _insert(table, table_values, fps, values):
+    """Vectorized linear-probing insert; returns the fingerprints that were not already present"""
+    n = np.uint64(table.shape[0])
+    slots = fps % n
+    pending = np.arange(len(fps))
+    added = []
+
+    while len(pending):
+        current = table[slots[pending]]
+        present = current == fps[pending]
+        empty = current == 0
+
+        # Keys racing for the same empty slot: the first one takes it, the rest look again
+        candidates = pending[empty]
+        _, first = np.unique(slots[candidates], return_index=True)
+        winners = candidates[first]
+        table[slots[winners]] = fps[winners]
+        if table_values is not None:
+            table_values[slots[winners]] = values[winners]
+        added.append(fps[winners])
+
+        # Slots held by another key move on; duplicates of a winner find it next round
+        occupied = pending[~present & ~empty]
+        slots[occupied] = slots[occupied] + np.uint64(1)
+        slots[occupied[slots[occupied] == n]] = 0
+        waiting = np.ones(len(fps), dtype=bool)
+        waiting[pending[present]] = False
+        waiting[winners] = False
+        pending = pending[waiting[pending]]
+
+    return np.concatenate(added) if added else np.zeros(0, dtype=np.uint64)
+
+
+def _set_bloom_bits(bloom, bits, hashes, fps):
+    """Set the Bloom filter bits of every fingerprint, matching IdentifierIndex.might_contain"""
+    steps = (fps >> np.uint64(32)) | np.uint64(1)
+    for i in range(hashes):
+        # uint64 arithmetic wraps like the & MASK64 in might_contain()
+        positions = (fps + np.uint64(i) * steps) % np.uint64(bits)
+        np.bitwise_or.at(bloom, (positions >> np.uint64(3)).astype(np.int64),
+                         (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)))
+
+
+def owner_tag(amm_number):
+    """32-bit tag of the AMM number a lot was issued under"""
+    return fingerprint(amm_number) >> 32
+
+
+class AMMIndex:
+    def __init__(self, path, capacity=100_000, error_rate=0.01, create=True):
+        """Registered AMM numbers and the lot numbers used under each of them"""
+        self.path = path
+        self.amm_numbers = IdentifierIndex(os.path.join(path, 'amm_numbers'), capacity, error_rate, create)
+        # Each lot number maps to the owner_tag() of the AMM number it was issued under
+        self.lot_numbers = IdentifierIndex(os.path.join(path, 'lot_numbers'), capacity, error_rate, create,
+                                           values=True)
+
+    def check(self, amm_number, lot_number=None):
+        """Reason to reject a document outright, or None when its identifiers are consistent"""
+        if amm_number not in self.amm_numbers:
+            return 'unregistered_amm_number'
+        if lot_number:
+            owner = self.lot_numbers.get(lot_number)
+            if owner is not None and owner != owner_tag(amm_number):
+                return 'duplicate_lot_number'
+        return None
+
+    def add(self, amm_numbers, lot_numbers=None):
+        """Append AMM numbers and, pairwise, the lot numbers issued under them"""
+        added = self.amm_numbers.add(amm_numbers)
+        if lot_numbers is not None:
+            pairs = [(lot, amm) for lot, amm in zip(lot_numbers, amm_numbers) if isinstance(lot, str) and lot]
+            owners = [owner_tag(amm) for _, amm in pairs]
+            self.lot_numbers.add([lot for lot, _ in pairs], owners)
+        return added
+
+    def import_csv(self, csv_path, chunk_size=500_000):
+        """Append the amm_number (and lot_number, when present) columns of a CSV; returns new AMM numbers"""
+        import pandas as pd
+
+        columns = pd.read_csv(csv_path, nrows=0).columns
+        usecols = [name for name in ('amm_number', 'lot_number') if name in columns]
+        added = 0
+        for chunk in pd.read_csv(csv_path, usecols=usecols, dtype=str, chunksize=chunk_size):
+            lots = chunk['lot_number'].tolist() if 'lot_number' in chunk else None
+            added += self.add(chunk['amm_number'].tolist(), lots)
+        return added
+
+
+def benchmark(path, lookups=100_000):
+    """Load time, size, unknown-identifier check latency and false positive rate of an index"""
+    start = time.perf_counter()
+    index = AMMIndex(path, create=False)
+    load_ms = (time.perf_counter() - start) * 1e3
+    if not len(index.amm_numbers):
+        raise ValueError("Index is empty")
+
+    unknown = [f"AMM-UNKNOWN-{random.getrandbits(48):012x}" for _ in range(lookups)]
+    start = time.perf_counter()
+    for key in unknown:
+        index.check(key)
+    unknown_us = (time.perf_counter() - start) / lookups * 1e6
+    # Unknown identifiers that get past the Bloom filter and cost a table probe
+    false_positives = sum(index.amm_numbers.might_contain(fingerprint(key)) for key in unknown)
+
+    bloom_bytes, table_bytes = index.amm_numbers.nbytes()
+    lot_bloom, lot_table = index.lot_numbers.nbytes()
+    return {
+        'amm_numbers': len(index.amm_numbers),
+        'lot_numbers': len(index.lot_numbers),
+        'load_ms': load_ms,
+        'bloom_mb': (bloom_bytes + lot_bloom) / 1e6,
+        'table_mb': (table_bytes + lot_table) / 1e6,
+        'unknown_us': unknown_us,
+        'false_positive_rate': false_positives / lookups
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] in ('build', 'append'):
+        if sys.argv[1] == 'build' and os.path.exists(sys.argv[3]):
+            print(f"❌ {sys.argv[3]} already exists; use append to add identifiers")
+            sys.exit(1)
+        index = AMMIndex(sys.argv[3])
+        start = time.perf_counter()
+        count = index.import_csv(sys.argv[2])
+        bloom_bytes, table_bytes = index.amm_numbers.nbytes()
+        print(f"✅ Indexed {count} new AMM numbers in {time.perf_counter() - start:.1f}s "
+              f"({len(index.amm_numbers)} AMM numbers, {len(index.lot_numbers)} lot numbers; "
+              f"Bloom filter {bloom_bytes / 1e6:.1f} MB, table {table_bytes / 1e6:.1f} MB)")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'bench':
+        stats = benchmark(sys.argv[2])
+        print(f"{stats['amm_numbers']} AMM numbers, {stats['lot_numbers']} lot numbers: "
+              f"loaded in {stats['load_ms']:.1f} ms, Bloom filters {stats['bloom_mb']:.1f} MB, "
+              f"tables {stats['table_mb']:.1f} MB on disk")
+        print(f"Unknown AMM number: {stats['unknown_us']:.1f} µs per check, "
+              f"false positive rate {stats['false_positive_rate']:.2%}")
+    else:
+        print("Usage:")
+        print("  Build from a CSV with amm_number[, lot_number]: python amm_index.py build <CSV_PATH> <INDEX_DIR>")
+        print("  Append a CSV's identifiers:                    python amm_index.py append <CSV_PATH> <INDEX_DIR>")
+        print("  Load time and lookup benchmark:                python amm_index.py bench <INDEX_DIR>")
+        sys.exit(1)
@@ -0,0 +1,208 @@
+# async_server.py
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fraud_detector import allowed_file, error_status
+from metrics import observe_stage, record_outcome, render_metrics
+
+
+class MicroBatcher:
+    def __init__(self, detector, max_batch_size=32, max_wait_ms=5.0):
+        """Coalesce concurrent scoring requests into batched model calls"""
+        self.detector = detector
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.batches = 0
+        self.records = 0
+        self._queue = None
+        self._task = None
+        # One scoring thread: batches run back to back, never on the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def start(self):
+        """Start the flush loop on the running event loop"""
+        self._queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._executor.shutdown(wait=False)
+
+    async def score(self, record):
+        """Queue one record and wait for its prediction"""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((record, future))
+        return await future
+
+    async def _run(self):
+        """Flush when the batch is full or the oldest request has waited max_wait"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            records = [record for record, _ in batch]
+            try:
+                results = await loop.run_in_executor(self._executor, self.detector.predict_batch, records)
+            except Exception:
+                # Score one by one so a single bad record only fails its own request
+                results = await loop.run_in_executor(self._executor, self.detector.predict_each, records)
+
+            self.batches += 1
+            self.records += len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.cancelled():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'records': self.records,
+            'mean_batch_size': self.records / self.batches if self.batches else 0.0
+        }
+
+
+def create_async_app(detector, pool=None, max_batch_size=32, max_wait_ms=5.0, max_upload_size=32 * 1024 * 1024):
+    """aiohttp application serving /validate_amm with micro-batched scoring"""
+    from aiohttp import web
+
+    batcher = MicroBatcher(detector, max_batch_size, max_wait_ms)
+    health = detector.self_test()
+    # PDF parsing and hashing run here (or on the worker pool), never on the event loop
+    parse_executor = ThreadPoolExecutor(max_workers=4)
+
+    def extract(upload):
+        """Return (cache_key, cached_result, extracted_data) for an upload's file object"""
+        # Large uploads are spooled to disk by aiohttp, so even reading them blocks
+        pdf_bytes = upload.read()
+        key = None
+        if detector.cache is not None:
+            key = detector.document_key(io.BytesIO(pdf_bytes))
+            cached = detector.cache.get(key)
+            if cached is not None:
+                return key, cached, None
+
+        if pool is not None:
+            return key, None, pool.process_pdf(pdf_bytes)
+        return key, None, detector.process_pdf(pdf_bytes)
+
+    async def health_check(request):
+        # Cached startup self-test: probes never touch the model
+        return web.json_response({
+            **health,
+            "cache": detector.cache.stats() if detector.cache is not None else None,
+            "batching": batcher.stats()
+        }, status=200 if health['status'] == 'healthy' else 500)
+
+    async def metrics(request):
+        return web.Response(text=render_metrics(), content_type='text/plain', charset='utf-8')
+
+    async def validate_amm(request):
+        """Endpoint for validating AMM PDFs"""
+        start = time.perf_counter()
+        form = await request.post()
+        observe_stage('upload_read', time.perf_counter() - start)
+        if 'file' not in form:
+            return web.json_response({'error': 'No file part'}, status=400)
+
+        file = form['file']
+        if not isinstance(file, web.FileField) or file.filename == '':
+            return web.json_response({'error': 'No selected file'}, status=400)
+        if not allowed_file(file.filename):
+            return web.json_response({'error': 'Invalid file type'}, status=400)
+
+        loop = asyncio.get_running_loop()
+        try:
+            key, cached, extracted_data = await loop.run_in_executor(parse_executor, extract, file.file)
+            if cached is not None:
+                record_outcome(cached)
+                return web.json_response(cached, dumps=_dumps)
+
+            if 'rejection' in extracted_data:
+                result = detector.rejected_result(extracted_data)
+                record_outcome(result)
+                return web.json_response(result, dumps=_dumps)
+
+            validation_result = await batcher.score(extracted_data)
+            result = {
+                'status': validation_result['status'],
+                'probability': validation_result['probability'],
+                'extracted_data': extracted_data,
+                'engineered_features': validation_result['engineered_features'],
+                'model_version': detector.model_version
+            }
+            if key is not None:
+                # SQLite write when the cache has a disk tier: off the event loop
+                await loop.run_in_executor(parse_executor, detector.cache_result, key, result)
+            record_outcome(result)
+            return web.json_response(result, dumps=_dumps)
+        except Exception as e:
+            record_outcome(e)
+            return web.json_response({'error': str(e)}, status=error_status(e))
+
+    async def preflight(request):
+        return web.Response()
+
+    @web.middleware
+    async def cors(request, handler):
+        # Same open CORS policy as flask_cors(app) on the Flask server
+        if request.method == 'OPTIONS':
+            response = await preflight(request)
+            response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+            response.headers['Access-Control-Allow-Headers'] = request.headers.get(
+                'Access-Control-Request-Headers', '*'
+            )
+        else:
+            try:
+                response = await handler(request)
+            except web.HTTPRequestEntityTooLarge:
+                response = web.json_response(
+                    {'error': f'Upload exceeds the {max_upload_size} byte limit'}, status=413
+                )
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        return response
+
+    async def on_startup(app):
+        batcher.start()
+
+    async def on_cleanup(app):
+        await batcher.stop()
+        parse_executor.shutdown(wait=False)
+        if pool is not None:
+            pool.close()
+
+    app = web.Application(client_max_size=max_upload_size, middlewares=[cors])
+    app['batcher'] = batcher
+    app.router.add_get('/health', health_check)
+    app.router.add_get('/metrics', metrics)
+    app.router.add_post('/validate_amm', validate_amm)
+    app.router.add_route('OPTIONS', '/{tail:.*}', preflight)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def _dumps(value):
+    """json.dumps that accepts the NumPy scalars in engineered_features"""
+    import json
+
+    return json.dumps(value, default=float)
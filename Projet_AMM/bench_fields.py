@@ -0,0 +1,98 @@
+# bench_fields.py
+import re
+import sys
+import timeit
+
+from amm_fields import FIELD_EXTRACTOR
+
+PAGE_ONE = """ATTESTATION DE MISE SUR LE MARCHÉ
+Numéro AMM: AMM-2023-2382
+Médicament: PARACETAMOL ZENITH 500mg
+Substance Active: paracétamol
+Forme Pharmaceutique: comprimé pelliculé
+Date Fabrication: 2024-11-04
+Date Péremption: 2027-04-23
+Fabricant: LABORATOIRES ZENITH
+Pays d'Origine: France
+Numéro de Lot: LOT670583
+Conditions de Conservation: 2-8°C, max 60%
+"""
+
+ANNEX_LINE = "Annexe technique: résultats des essais de stabilité du lot, Numéro interne 42\n"
+
+
+def legacy_validate_amm_format(text):
+    """Eight-scan implementation the single-pass extractor replaces"""
+    required_fields = {
+        'Numéro AMM': r'Numéro AMM:\s*([A-Z0-9-]+)',
+        'Médicament': r'Médicament:\s*([^\n]+)',
+        'Substance Active': r'Substance Active:\s*([^\n]+)',
+        'Forme Pharmaceutique': r'Forme Pharmaceutique:\s*([^\n]+)',
+        'Date Fabrication': r'Date Fabrication:\s*(\d{4}-\d{2}-\d{2})',
+        'Date Péremption': r'Date Péremption:\s*(\d{4}-\d{2}-\d{2})',
+        'Fabricant': r'Fabricant:\s*([^\n]+)',
+        'Numéro de Lot': r'Numéro de Lot:\s*([^\n]+)'
+    }
+
+    missing_fields = []
+    extracted_data = {}
+
+    for field, pattern in required_fields.items():
+        match = re.search(pattern, text)
+        if not match:
+            missing_fields.append(field)
+        else:
+            extracted_data[field] = match.group(1).strip()
+
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+
+    return extracted_data
+
+
+def single_pass_validate_amm_format(text):
+    """Same contract as legacy_validate_amm_format using the compiled extractor"""
+    extracted_data = FIELD_EXTRACTOR.extract(text)
+    missing_fields = FIELD_EXTRACTOR.missing(extracted_data)
+    if missing_fields:
+        raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
+    return extracted_data
+
+
+def make_text(annex_lines, fields_first=True):
+    """Build a document with the attestation before or after its annexes"""
+    annex = ANNEX_LINE * annex_lines
+    return PAGE_ONE + annex if fields_first else annex + PAGE_ONE
+
+
+def inline_page(prefix='Page 1 '):
+    """Attestation page whose text extraction ran every label together on one line"""
+    return prefix + ' '.join(PAGE_ONE.splitlines()[1:]) + '\n'
+
+
+def documents(sizes):
+    """(name, text) pairs: single pages first, as validate_pdf extracts page by page, then long texts"""
+    yield 'page', PAGE_ONE
+    yield 'inline page', inline_page()
+    for annex_lines in sizes:
+        yield f'{annex_lines} annex, first', make_text(annex_lines, True)
+        yield f'{annex_lines} annex, last', make_text(annex_lines, False)
+
+
+def run(sizes=(100, 1_000, 10_000), repeat=5):
+    """Time both implementations and print the best run per document"""
+    print(f"{'document':>20} {'chars':>9} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}")
+    for name, text in documents(sizes):
+        assert legacy_validate_amm_format(text) == {
+            k: v for k, v in single_pass_validate_amm_format(text).items()
+            if k in FIELD_EXTRACTOR.required
+        }
+
+        number = max(1, 200_000 // len(text))
+        legacy = min(timeit.repeat(lambda: legacy_validate_amm_format(text), number=number, repeat=repeat)) / number
+        single = min(timeit.repeat(lambda: single_pass_validate_amm_format(text), number=number, repeat=repeat)) / number
+        print(f"{name:>20} {len(text):>9} {legacy * 1e3:>10.4f} {single * 1e3:>10.4f} {legacy / single:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run(repeat=int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,79 @@
+# bench_startup.py
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Runs in a fresh interpreter so every measurement is a true cold start
+PROBE = r'''
+import json, sys, time
+start = time.perf_counter()
+import fraud_detector
+imported = time.perf_counter()
+detector = fraud_detector.PharmaFraudDetector(sys.argv[1])
+loaded = time.perf_counter()
+detector.predict_fast({
+    'manufacturer': 'CureAll', 'submission_date': '2023-01-01', 'approval_date': '2023-03-01',
+    'clinical_trial_participants': 1000, 'reported_side_effects': 50, 'batch_size': 100000,
+    'price_per_unit': 10.0, 'production_cost': 5.0
+})
+predicted = time.perf_counter()
+detector.predict_fast(detector.process_pdf(sys.argv[2]))
+validated = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1e3,
+    'model_load_ms': (loaded - imported) * 1e3,
+    'first_prediction_ms': (predicted - start) * 1e3,
+    'first_pdf_validation_ms': (validated - start) * 1e3,
+    'heavy_modules_loaded': sorted(m for m in ('pandas', 'flask', 'sklearn', 'joblib') if m in sys.modules)
+}))
+'''
+
+
+def measure(model_path, pdf_path, runs):
+    """Median cold-start timings over several fresh interpreters"""
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, '-c', PROBE, model_path, pdf_path],
+            cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+
+    result = {
+        key: statistics.median(sample[key] for sample in samples)
+        for key in ('import_ms', 'model_load_ms', 'first_prediction_ms', 'first_pdf_validation_ms')
+    }
+    result['heavy_modules_loaded'] = samples[-1]['heavy_modules_loaded']
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for fraud_detector.py")
+    parser.add_argument('--model', default='amm.joblib')
+    parser.add_argument('--pdf', default='pdf_output/AMM-2023-2382_VALID.pdf')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-import-ms', type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument('--max-first-prediction-ms', type=float,
+                        help="Fail if the median time to first prediction exceeds this")
+    args = parser.parse_args()
+
+    result = measure(args.model, args.pdf, args.runs)
+    print(json.dumps(result, indent=2))
+
+    failures = []
+    if args.max_import_ms is not None and result['import_ms'] > args.max_import_ms:
+        failures.append(f"import took {result['import_ms']:.0f} ms (limit {args.max_import_ms:.0f} ms)")
+    if args.max_first_prediction_ms is not None and result['first_prediction_ms'] > args.max_first_prediction_ms:
+        failures.append(
+            f"first prediction took {result['first_prediction_ms']:.0f} ms "
+            f"(limit {args.max_first_prediction_ms:.0f} ms)"
+        )
+
+    if failures:
+        print("❌ Startup regression: " + "; ".join(failures))
+        sys.exit(1)
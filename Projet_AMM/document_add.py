@@ -1,11 +1,40 @@
+import argparse
 import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 import random
 
+import numpy as np
+
+MANUFACTURERS = ["PharmaCorp", "HealthGen", "MediVita", "CureAll", "BioPharm Solutions"]
+PRODUCTS = ["MediSafeX", "QuickHeal", "PainAway", "FlexiJoint", "CardioPlus"]
+
+HEADERS = [
+    "amm_number", "product_name", "manufacturer", "submission_date", "approval_date",
+    "clinical_trial_participants", "reported_side_effects", "batch_size",
+    "price_per_unit", "production_cost", "is_fraud", "suspicious_patterns"
+]
+
+# Fraud indicators in the order they are listed in suspicious_patterns
+PATTERNS = ["fast_approval", "high_markup", "high_side_effects", "small_batch", "small_trial"]
+
+# suspicious_patterns text for every combination of PATTERNS bits
+PATTERN_TEXT = np.array([
+    ",".join(name for bit, name in enumerate(PATTERNS) if mask >> bit & 1) or "none"
+    for mask in range(1 << len(PATTERNS))
+], dtype=object)
+
+def amm_number_width(max_id):
+    """Zero-padding that keeps every amm_number up to max_id the same length, so they sort"""
+    return max(3, len(str(max_id)))
+
 # Generate realistic pharmaceutical data
 def generate_amm_data(num_records):
     data = []
-    manufacturers = ["PharmaCorp", "HealthGen", "MediVita", "CureAll", "BioPharm Solutions"]
+    manufacturers = MANUFACTURERS
     products = {
         "MediSafeX": {"type": "antibiotic", "normal_dosage": "500mg", "suspicious_dosage": "2000mg"},
         "QuickHeal": {"type": "painkiller", "normal_dosage": "400mg", "suspicious_dosage": "800mg"},
@@ -13,18 +42,19 @@ def generate_amm_data(num_records):
         "FlexiJoint": {"type": "anti-inflammatory", "normal_dosage": "100mg", "suspicious_dosage": "500mg"},
         "CardioPlus": {"type": "cardiovascular", "normal_dosage": "50mg", "suspicious_dosage": "200mg"}
     }
-    
+    width = amm_number_width(num_records)
+
     for i in range(1, num_records + 1):
-        amm_number = f"AMM-2023-{i:03d}"
+        amm_number = f"AMM-2023-{i:0{width}d}"
         product_name = random.choice(list(products.keys()))
         manufacturer = random.choice(manufacturers)
-        
+
         # Generate realistic dates
         submission_date = datetime(2023, 1, 1) + timedelta(days=random.randint(0, 180))
-        
+
         # Determine if this will be a fraudulent record
         is_fraud = random.random() < 0.2  # 20% chance of fraud
-        
+
         if is_fraud:
             # Fraudulent characteristics
             approval_days = random.randint(1, 14)  # Suspiciously fast approval
@@ -41,9 +71,9 @@ def generate_amm_data(num_records):
             batch_size = random.choice([100000, 150000, 200000])  # Normal batch size
             production_cost = round(random.uniform(5.0, 15.0), 2)  # Normal cost
             price = round(production_cost * random.uniform(3.0, 8.0), 2)  # Normal markup
-        
+
         approval_date = submission_date + timedelta(days=approval_days)
-        
+
         # Additional fraud indicators
         suspicious_patterns = []
         if is_fraud:
@@ -57,7 +87,7 @@ def generate_amm_data(num_records):
                 suspicious_patterns.append("small_batch")
             if participants < 500:
                 suspicious_patterns.append("small_trial")
-        
+
         data.append([
             amm_number,
             product_name,
@@ -72,24 +102,194 @@ def generate_amm_data(num_records):
             is_fraud,
             ",".join(suspicious_patterns) if suspicious_patterns else "none"
         ])
-    
+
     return data
 
 # Write to CSV
 def write_to_csv(filename, data):
-    headers = [
-        "amm_number", "product_name", "manufacturer", "submission_date", "approval_date",
-        "clinical_trial_participants", "reported_side_effects", "batch_size",
-        "price_per_unit", "production_cost", "is_fraud", "suspicious_patterns"
-    ]
-    
     with open(filename, 'w', newline='') as csvfile:
         writer = csv.writer(csvfile)
-        writer.writerow(headers)
+        writer.writerow(HEADERS)
         writer.writerows(data)
     print(f"Generated {filename} with {len(data)} records")
     print(f"Fraud rate: {sum(1 for row in data if row[10] == 1)/len(data):.1%}")
 
-# Generate and save data
-pharma_data = generate_amm_data(1000)  # Generate 1000 records
-write_to_csv("pharma_amm_data.csv", pharma_data)
\ No newline at end of file
+# Vectorized generation: same distributions as generate_amm_data, one column at a time
+def generate_amm_columns(start_id, count, rng, is_fraud=None):
+    """Draw records start_id .. start_id + count - 1 as a dict of NumPy columns"""
+    if is_fraud is None:
+        is_fraud = rng.random(count) < 0.2  # 20% chance of fraud
+    else:
+        is_fraud = np.asarray(is_fraud, dtype=bool)  # Labels fixed by the caller, e.g. a PDF corpus
+    fraud = np.flatnonzero(is_fraud)
+    normal = np.flatnonzero(~is_fraud)
+    n_fraud, n_normal = len(fraud), len(normal)
+
+    approval_days = np.empty(count, dtype=np.int32)
+    participants = np.empty(count, dtype=np.int32)
+    side_effects = np.empty(count, dtype=np.int32)
+    batch_size = np.empty(count, dtype=np.int32)
+    production_cost = np.empty(count)
+    markup = np.empty(count)
+
+    # Fraudulent characteristics
+    approval_days[fraud] = rng.integers(1, 15, n_fraud)
+    participants[fraud] = rng.integers(150, 501, n_fraud)
+    side_effects[fraud] = participants[fraud] * rng.uniform(0.15, 0.3, n_fraud)
+    batch_size[fraud] = rng.choice([10000, 20000, 30000], n_fraud)
+    production_cost[fraud] = rng.uniform(2.0, 5.0, n_fraud)
+    markup[fraud] = rng.uniform(15.0, 30.0, n_fraud)
+
+    # Normal characteristics
+    approval_days[normal] = rng.integers(60, 181, n_normal)
+    participants[normal] = rng.integers(800, 2001, n_normal)
+    side_effects[normal] = rng.integers(5, (participants[normal] * 0.1).astype(np.int32) + 1)
+    batch_size[normal] = rng.choice([100000, 150000, 200000], n_normal)
+    production_cost[normal] = rng.uniform(5.0, 15.0, n_normal)
+    markup[normal] = rng.uniform(3.0, 8.0, n_normal)
+
+    production_cost = production_cost.round(2)
+    price = (production_cost * markup).round(2)
+
+    submission_date = np.datetime64('2023-01-01') + rng.integers(0, 181, count).astype('timedelta64[D]')
+
+    # Additional fraud indicators, as a bitmask over PATTERNS
+    patterns = (
+        (approval_days < 30)
+        | (price / production_cost > 10) << 1
+        | (side_effects / participants > 0.15) << 2
+        | (batch_size < 50000) << 3
+        | (participants < 500) << 4
+    ).astype(np.uint8) * is_fraud
+
+    return {
+        'amm_id': np.arange(start_id, start_id + count, dtype=np.int64),
+        'product_name': rng.integers(0, len(PRODUCTS), count, dtype=np.uint8),
+        'manufacturer': rng.integers(0, len(MANUFACTURERS), count, dtype=np.uint8),
+        'submission_date': submission_date,
+        'approval_date': submission_date + approval_days.astype('timedelta64[D]'),
+        'clinical_trial_participants': participants,
+        'reported_side_effects': side_effects,
+        'batch_size': batch_size,
+        'price_per_unit': price,
+        'production_cost': production_cost,
+        'is_fraud': is_fraud,
+        'suspicious_patterns': patterns.astype(np.uint8)
+    }
+
+def iter_amm_chunks(start_chunk, stop_chunk, num_records, seed, chunk_size):
+    """Yield column chunks start_chunk .. stop_chunk - 1 of a num_records dataset"""
+    for chunk in range(start_chunk, stop_chunk):
+        start_id = chunk * chunk_size + 1
+        count = min(chunk_size, num_records - start_id + 1)
+        # Seeded per chunk, so the data is the same however chunks are split into shards
+        yield generate_amm_columns(start_id, count, np.random.default_rng([seed, chunk]))
+
+def columns_to_frame(columns, width):
+    """pharma_amm_data.csv-shaped DataFrame of a column chunk"""
+    import pandas as pd
+
+    return pd.DataFrame({
+        'amm_number': 'AMM-2023-' + pd.Series(columns['amm_id']).astype(str).str.zfill(width),
+        'product_name': np.array(PRODUCTS, dtype=object)[columns['product_name']],
+        'manufacturer': np.array(MANUFACTURERS, dtype=object)[columns['manufacturer']],
+        'submission_date': np.datetime_as_string(columns['submission_date']),
+        'approval_date': np.datetime_as_string(columns['approval_date']),
+        'clinical_trial_participants': columns['clinical_trial_participants'],
+        'reported_side_effects': columns['reported_side_effects'],
+        'batch_size': columns['batch_size'],
+        'price_per_unit': columns['price_per_unit'],
+        'production_cost': columns['production_cost'],
+        'is_fraud': columns['is_fraud'].astype(np.int8),
+        'suspicious_patterns': PATTERN_TEXT[columns['suspicious_patterns']]
+    })
+
+def write_shard(path, fmt, start_chunk, stop_chunk, num_records, seed, chunk_size):
+    """Write one shard as CSV or as a directory of .npy columns; returns (rows, frauds)"""
+    width = amm_number_width(num_records)
+    start_id = start_chunk * chunk_size + 1
+    rows = min(stop_chunk * chunk_size, num_records) - start_id + 1
+    chunks = iter_amm_chunks(start_chunk, stop_chunk, num_records, seed, chunk_size)
+    written = frauds = 0
+
+    if fmt == 'csv':
+        with open(path, 'w', newline='') as f:
+            for columns in chunks:
+                columns_to_frame(columns, width).to_csv(f, header=written == 0, index=False, float_format='%.2f')
+                written += len(columns['amm_id'])
+                frauds += int(columns['is_fraud'].sum())
+        return written, frauds
+
+    # Columnar: one preallocated .npy per column, filled chunk by chunk and loadable with mmap_mode='r'
+    os.makedirs(path, exist_ok=True)
+    arrays = {}
+    for columns in chunks:
+        count = len(columns['amm_id'])
+        for name, values in columns.items():
+            if name not in arrays:
+                arrays[name] = np.lib.format.open_memmap(
+                    os.path.join(path, f"{name}.npy"), mode='w+', dtype=values.dtype, shape=(rows,)
+                )
+            arrays[name][written:written + count] = values
+        written += count
+        frauds += int(columns['is_fraud'].sum())
+
+    for array in arrays.values():
+        array.flush()
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump({
+            'rows': written,
+            'amm_number_format': f"AMM-2023-{{:0{width}d}}",
+            'product_name': PRODUCTS,
+            'manufacturer': MANUFACTURERS,
+            'suspicious_patterns': PATTERNS,
+            'seed': seed,
+            'chunk_size': chunk_size
+        }, f, indent=2)
+    return written, frauds
+
+def shard_paths(output, fmt, shards):
+    """Output path of each shard: output itself, or numbered siblings when sharded"""
+    if shards == 1:
+        return [output]
+    root, ext = os.path.splitext(output) if fmt == 'csv' else (output, '')
+    return [f"{root}-{shard:03d}{ext}" for shard in range(shards)]
+
+def generate_dataset(output, num_records, seed=42, chunk_size=1_000_000, shards=1, fmt='csv', processes=1):
+    """Generate num_records rows into one or more shards with disjoint, contiguous ID ranges"""
+    n_chunks = -(-num_records // chunk_size)
+    shards = max(1, min(shards, n_chunks))
+    # Whole chunks per shard, so each shard regenerates exactly the rows of an unsharded run
+    bounds = [n_chunks * shard // shards for shard in range(shards + 1)]
+    tasks = [
+        (path, fmt, bounds[shard], bounds[shard + 1], num_records, seed, chunk_size)
+        for shard, path in enumerate(shard_paths(output, fmt, shards))
+    ]
+
+    if processes > 1 and shards > 1:
+        with ProcessPoolExecutor(min(processes, shards)) as executor:
+            results = list(executor.map(write_shard, *zip(*tasks)))
+    else:
+        results = [write_shard(*task) for task in tasks]
+
+    return [task[0] for task in tasks], sum(r[0] for r in results), sum(r[1] for r in results)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic AMM registration data")
+    parser.add_argument('--rows', type=int, default=1000, help="Records to generate")
+    parser.add_argument('--output', default="pharma_amm_data.csv",
+                        help="CSV file, or directory of .npy columns with --format npy")
+    parser.add_argument('--format', choices=['csv', 'npy'], default='csv', help="Output format")
+    parser.add_argument('--seed', type=int, default=42, help="Seed; the same seed gives the same data")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="Rows generated and written at a time")
+    parser.add_argument('--shards', type=int, default=1, help="Output files with disjoint amm_number ranges")
+    parser.add_argument('--processes', type=int, default=1, help="Shards generated in parallel")
+    args = parser.parse_args()
+
+    # Generate and save data
+    start = time.perf_counter()
+    paths, rows, frauds = generate_dataset(args.output, args.rows, args.seed, args.chunk_size,
+                                           args.shards, args.format, args.processes)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {', '.join(paths)} with {rows} records in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+    print(f"Fraud rate: {frauds / rows:.1%}")
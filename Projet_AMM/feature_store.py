@@ -0,0 +1,363 @@
+# feature_store.py
+# Engineered features stored once, column by column, for training and bulk rescoring.
+# Each column is a raw binary file opened memory-mapped: float32 values (NaN where a
+# raw field was missing), bit-packed flags and one-hots, and amm_number as offsets
+# into a byte blob.
+# Appends only engineer the CSV rows added since the last update.
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from fraud_detector import BASE_FEATURES, coerce_raw, engineer_features, fill_missing
+
+META_FILE = 'meta.json'
+
+# Storage of the non-manufacturer columns; 'bits' columns are bit-packed booleans.
+# Counts and day spans are float32 too, which holds them exactly and keeps a missing
+# value as NaN (an int32 cast would turn it into -2147483648, a plausible feature)
+BASE_DTYPES = {
+    'approval_time': 'float32',
+    'price_to_cost_ratio': 'float32',
+    'batch_size_variation': 'float32',
+    'fast_approval': 'bits',
+    'clinical_trial_participants': 'float32',
+    'reported_side_effects': 'float32'
+}
+
+
+def median_from_counts(counts):
+    """Median of the values behind a value_counts() Series, as Series.median() gives"""
+    counts = counts.sort_index()
+    cumulative = counts.cumsum().to_numpy()
+    total = cumulative[-1]
+    values = counts.index.to_numpy(dtype=float)
+    low = values[np.searchsorted(cumulative, (total - 1) // 2 + 1)]
+    high = values[np.searchsorted(cumulative, total // 2 + 1)]
+    return float((low + high) / 2)
+
+
+def csv_schema(csv_path, chunk_size=500_000):
+    """Training schema of a CSV: sorted manufacturer vocabulary and exact batch-size median"""
+    import pandas as pd
+    from fraud_detector import model_schema
+
+    manufacturers = set()
+    batch_counts = None
+    for chunk in pd.read_csv(csv_path, usecols=['manufacturer', 'batch_size'], chunksize=chunk_size):
+        manufacturers.update(chunk['manufacturer'].fillna('Unknown').unique())
+        counts = chunk['batch_size'].value_counts()
+        batch_counts = counts if batch_counts is None else batch_counts.add(counts, fill_value=0)
+
+    features = BASE_FEATURES + [f'manufacturer_{mfg}' for mfg in sorted(manufacturers)]
+    return model_schema(features, median_from_counts(batch_counts))
+
+
+class _Bounded(io.RawIOBase):
+    """Read-only view of a file's bytes [start, stop), so rows appended meanwhile wait for the next update"""
+
+    def __init__(self, f, stop):
+        self.f = f
+        self.stop = stop
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        remaining = self.stop - self.f.tell()
+        if remaining <= 0:
+            return 0
+        data = self.f.read(min(len(buffer), remaining))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+class FeatureStore:
+    def __init__(self, path):
+        """Open an existing store directory"""
+        self.path = path
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+        self.schema = self.meta['schema']
+        self.rows = self.meta['rows']
+        self._trimmed = False
+
+    @classmethod
+    def create(cls, path, schema, labels=True):
+        """New empty store for features engineered with schema (see fraud_detector.model_schema)"""
+        os.makedirs(path, exist_ok=True)
+        columns = dict(BASE_DTYPES)
+        for i, mfg in enumerate(schema['manufacturers']):
+            columns[f'manufacturer_{mfg}'] = 'bits'
+        if labels:
+            columns['is_fraud'] = 'bits'
+
+        files = {name: f'col{i:03d}.bin' for i, name in enumerate(columns)}
+        for name in files.values():
+            open(os.path.join(path, name), 'wb').close()
+        for name in ('amm_number.offsets', 'amm_number.bytes'):
+            open(os.path.join(path, name), 'wb').close()
+
+        store_meta = {
+            'rows': 0,
+            'schema': {
+                'features': list(schema['features']),
+                'manufacturers': list(schema['manufacturers']),
+                'median_batch': float(schema['median_batch'])
+            },
+            'columns': {name: {'dtype': dtype, 'file': files[name]} for name, dtype in columns.items()},
+            'sources': {}
+        }
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump(store_meta, f, indent=2)
+        return cls(path)
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _column_bytes(self, dtype, rows):
+        return -(-rows // 8) if dtype == 'bits' else rows * np.dtype(dtype).itemsize
+
+    def _truncate(self):
+        """Cut every column file back to the committed row count"""
+        for column in self.meta['columns'].values():
+            os.truncate(self._file(column['file']), self._column_bytes(column['dtype'], self.rows))
+        os.truncate(self._file('amm_number.offsets'), self.rows * 8)
+        blob_size = int(self._offsets()[-1]) if self.rows else 0
+        os.truncate(self._file('amm_number.bytes'), blob_size)
+
+    def _offsets(self):
+        return np.memmap(self._file('amm_number.offsets'), dtype=np.int64, mode='r', shape=(self.rows,)) \
+            if self.rows else np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return self.rows
+
+    def nbytes(self):
+        """Size of the store on disk"""
+        return sum(os.path.getsize(self._file(name)) for name in os.listdir(self.path))
+
+    # Writing
+
+    def append_frame(self, df):
+        """Engineer and append a DataFrame of raw pharma_amm_data.csv rows; returns rows added"""
+        if not len(df):
+            return 0
+        if not self._trimmed:
+            # Column data past meta['rows'] is an interrupted append; readers never see it
+            self._truncate()
+            self._trimmed = True
+        # Same missing-value handling as training
+        df = fill_missing(coerce_raw(df.copy()), self.schema['median_batch'])
+        df = engineer_features(df, self.schema['median_batch'], self.schema['manufacturers'])
+
+        for name, column in self.meta['columns'].items():
+            values = df[name].to_numpy()
+            with open(self._file(column['file']), 'r+b') as f:
+                if column['dtype'] == 'bits':
+                    self._append_bits(f, values.astype(bool))
+                else:
+                    f.seek(0, os.SEEK_END)
+                    f.write(values.astype(column['dtype']).tobytes())
+
+        encoded = [str(amm).encode() for amm in df['amm_number']]
+        start = int(self._offsets()[-1]) if self.rows else 0
+        with open(self._file('amm_number.bytes'), 'ab') as f:
+            f.write(b''.join(encoded))
+        with open(self._file('amm_number.offsets'), 'ab') as f:
+            f.write((start + np.cumsum([len(e) for e in encoded], dtype=np.int64)).tobytes())
+
+        self.rows += len(df)
+        return len(df)
+
+    def _append_bits(self, f, bits):
+        """Append booleans to a packed column, completing its last partial byte first"""
+        used = self.rows % 8
+        if used:
+            f.seek(self.rows // 8)
+            last = np.unpackbits(np.frombuffer(f.read(1), dtype=np.uint8))[:used].astype(bool)
+            bits = np.concatenate([last, bits])
+        f.seek(self.rows // 8)
+        f.truncate()
+        f.write(np.packbits(bits).tobytes())
+
+    def commit(self, sources=None):
+        """Make appended rows (and source offsets) visible to readers"""
+        self.meta['rows'] = self.rows
+        if sources:
+            self.meta['sources'].update(sources)
+        tmp = self._file(META_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.meta, f, indent=2)
+        os.replace(tmp, self._file(META_FILE))
+
+    def update_from_csv(self, csv_path, chunk_size=200_000):
+        """Engineer only the rows appended to csv_path since the last update; returns rows added"""
+        import pandas as pd
+
+        source = os.path.abspath(csv_path)
+        added = 0
+        with open(csv_path, 'rb') as f:
+            header = f.readline().decode().rstrip('\r\n').split(',')
+            start = self.meta['sources'].get(source, f.tell())
+
+            # Stop after the last complete line, so a row being written is picked up next time
+            end = os.fstat(f.fileno()).st_size
+            f.seek(max(start, end - 65536))
+            tail = f.read(end - f.tell())
+            end -= len(tail) - (tail.rfind(b'\n') + 1)
+            if end <= start:
+                return 0
+
+            f.seek(start)
+            reader = io.BufferedReader(_Bounded(f, end))
+            for chunk in pd.read_csv(reader, names=header, header=None, chunksize=chunk_size):
+                added += self.append_frame(chunk)
+
+        self.commit({source: end})
+        return added
+
+    # Reading
+
+    def column(self, name, start=0, stop=None):
+        """Values of one column for rows [start, stop), memory-mapped where the dtype allows"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        column = self.meta['columns'][name]
+        if column['dtype'] == 'bits':
+            packed = np.memmap(self._file(column['file']), dtype=np.uint8, mode='r',
+                               shape=(self._column_bytes('bits', self.rows),)) if self.rows else np.zeros(0, np.uint8)
+            first = start // 8
+            bits = np.unpackbits(packed[first:-(-stop // 8)])
+            return bits[start - first * 8:stop - first * 8].astype(bool)
+        if not self.rows:
+            return np.zeros(0, dtype=column['dtype'])
+        return np.memmap(self._file(column['file']), dtype=column['dtype'], mode='r', shape=(self.rows,))[start:stop]
+
+    def matrix(self, start=0, stop=None):
+        """float32 feature matrix of rows [start, stop) in the schema's feature order"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        X = np.empty((max(0, stop - start), len(self.schema['features'])), dtype=np.float32)
+        for j, name in enumerate(self.schema['features']):
+            X[:, j] = self.column(name, start, stop)
+        return X
+
+    def labels(self, start=0, stop=None):
+        return self.column('is_fraud', start, stop)
+
+    def amm_numbers(self, start=0, stop=None):
+        """amm_number strings of rows [start, stop)"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        offsets = self._offsets()
+        begin = int(offsets[start - 1]) if start else 0
+        blob = np.memmap(self._file('amm_number.bytes'), dtype=np.uint8, mode='r',
+                         shape=(int(offsets[-1]),)) if self.rows else b''
+        data = bytes(blob[begin:int(offsets[stop - 1])]) if stop > start else b''
+        ends = offsets[start:stop] - begin
+        return [data[a:b].decode() for a, b in zip(np.concatenate([[0], ends[:-1]]), ends)]
+
+
+def score_store(store_path, output_path, model_path='amm.joblib', chunk_size=500_000):
+    """Rescore every row of a feature store, writing amm_number, predicted, probability (and actual), error"""
+    import pandas as pd
+    from fraud_detector import PharmaFraudDetector
+
+    start = time.perf_counter()
+    store = FeatureStore(store_path)
+    detector = PharmaFraudDetector(model_path)
+    if detector.features != store.schema['features'] or detector.median_batch != store.schema['median_batch']:
+        raise ValueError("Feature store was built for a different model schema; rebuild it with --model")
+
+    with open(output_path, 'w', newline='') as out:
+        for first in range(0, len(store), chunk_size):
+            last = min(first + chunk_size, len(store))
+            predicted, probability, error = detector.score_features(store.matrix(first, last))
+            scored = pd.DataFrame({
+                'amm_number': store.amm_numbers(first, last),
+                'predicted': predicted,
+                'probability': probability
+            })
+            if 'is_fraud' in store.meta['columns']:
+                scored['actual'] = store.labels(first, last).astype(int)
+            scored['error'] = error
+            scored.to_csv(out, header=first == 0, index=False)
+
+    seconds = time.perf_counter() - start
+    return {'rows': len(store), 'seconds': seconds, 'rows_per_second': len(store) / seconds if seconds else 0.0}
+
+
+def benchmark(store_path, csv_path):
+    """Load time and disk size of the store against parsing and engineering the CSV"""
+    import pandas as pd
+
+    store = FeatureStore(store_path)
+    schema = store.schema
+
+    start = time.perf_counter()
+    df = fill_missing(coerce_raw(pd.read_csv(csv_path)), schema['median_batch'])
+    X_csv = engineer_features(df, schema['median_batch'], schema['manufacturers'])[schema['features']].to_numpy()
+    csv_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X_store = FeatureStore(store_path).matrix()
+    store_seconds = time.perf_counter() - start
+
+    return {
+        'rows': len(store),
+        'csv_mb': os.path.getsize(csv_path) / 1e6,
+        'store_mb': store.nbytes() / 1e6,
+        'csv_load_s': csv_seconds,
+        'store_load_s': store_seconds,
+        'identical': bool(np.array_equal(X_csv.astype(np.float32), X_store))
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Columnar store of engineered AMM features")
+    commands = parser.add_subparsers(dest='command', required=True)
+    update = commands.add_parser('update', help="Create the store or append the CSV rows added since last time")
+    update.add_argument('csv_path')
+    update.add_argument('store')
+    update.add_argument('--model', help="Take the feature schema from this model instead of the CSV")
+    update.add_argument('--chunk-size', type=int, default=200_000)
+    score = commands.add_parser('score', help="Rescore every stored row")
+    score.add_argument('store')
+    score.add_argument('output')
+    score.add_argument('--model', default='amm.joblib')
+    bench = commands.add_parser('bench', help="Compare load time and size with the source CSV")
+    bench.add_argument('store')
+    bench.add_argument('csv_path')
+    args = parser.parse_args()
+
+    try:
+        if args.command == 'update':
+            start = time.perf_counter()
+            if os.path.isfile(os.path.join(args.store, META_FILE)):
+                store = FeatureStore(args.store)
+            else:
+                if args.model:
+                    from fraud_detector import load_model
+                    schema = load_model(args.model)[2]
+                else:
+                    schema = csv_schema(args.csv_path, args.chunk_size)
+                labels = 'is_fraud' in open(args.csv_path).readline().rstrip('\r\n').split(',')
+                store = FeatureStore.create(args.store, schema, labels)
+            added = store.update_from_csv(args.csv_path, args.chunk_size)
+            print(f"✅ Added {added} rows in {time.perf_counter() - start:.1f}s "
+                  f"({len(store)} rows, {store.nbytes() / 1e6:.1f} MB)")
+        elif args.command == 'score':
+            stats = score_store(args.store, args.output, args.model)
+            print(f"✅ Scored {stats['rows']} rows in {stats['seconds']:.1f}s "
+                  f"({stats['rows_per_second']:,.0f} rows/s) -> {args.output}")
+        else:
+            stats = benchmark(args.store, args.csv_path)
+            print(f"{stats['rows']} rows: CSV {stats['csv_mb']:.1f} MB parsed and engineered in "
+                  f"{stats['csv_load_s'] * 1e3:.0f} ms; store {stats['store_mb']:.1f} MB loaded in "
+                  f"{stats['store_load_s'] * 1e3:.0f} ms (identical features: {stats['identical']})")
+    except Exception as e:
+        print(f"\n❌ Feature store error: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,151 @@
+# forest_engine.py
+import json
+import os
+import sys
+
+import numpy as np
+
+# Files making up a compiled forest directory
+ARRAY_FILES = ['feature', 'threshold', 'left', 'right', 'value', 'roots']
+META_FILE = 'meta.json'
+
+
+def export_forest(model, out_dir, schema=None, version=None):
+    """Flatten a fitted RandomForestClassifier into contiguous node arrays
+
+    schema and version come from a train.py bundle and are kept in meta.json.
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    n_classes = len(model.classes_)
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees[:-1]])
+
+    features, thresholds, lefts, rights, values = [], [], [], [], []
+    for offset, tree in zip(offsets, trees):
+        nodes = np.arange(tree.node_count)
+        is_leaf = tree.children_left == -1
+
+        # Leaves point back at themselves so traversal can run a fixed number of steps
+        features.append(np.where(is_leaf, 0, tree.feature))
+        thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+        lefts.append(np.where(is_leaf, nodes, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, nodes, tree.children_right) + offset)
+
+        # Same per-tree normalization DecisionTreeClassifier.predict_proba applies
+        value = tree.value[:, 0, :n_classes]
+        normalizer = value.sum(axis=1)[:, np.newaxis]
+        normalizer[normalizer == 0.0] = 1.0
+        values.append(value / normalizer)
+
+    arrays = {
+        'feature': np.concatenate(features).astype(np.int32),
+        'threshold': np.concatenate(thresholds).astype(np.float64),
+        'left': np.concatenate(lefts).astype(np.int32),
+        'right': np.concatenate(rights).astype(np.int32),
+        'value': np.concatenate(values).astype(np.float64),
+        'roots': offsets.astype(np.int32),
+    }
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name in ARRAY_FILES:
+        np.save(os.path.join(out_dir, f'{name}.npy'), np.ascontiguousarray(arrays[name]))
+
+    meta = {
+        'classes': [int(c) for c in model.classes_],
+        'n_features': int(model.n_features_in_),
+        'feature_names': [str(f) for f in getattr(model, 'feature_names_in_', [])],
+        'max_depth': int(max(tree.max_depth for tree in trees)),
+    }
+    if schema is not None:
+        meta['schema'] = schema
+    if version is not None:
+        meta['version'] = version
+    with open(os.path.join(out_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    return out_dir
+
+
+def is_compiled_forest(path):
+    """Check whether a path holds an exported forest"""
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+def assert_all_finite(X):
+    """Reject NaN and infinite features with the errors sklearn's input validation raises"""
+    X = np.asarray(X, dtype=np.float32)
+    if not np.isfinite(X).all():
+        if np.isnan(X).any():
+            raise ValueError("Input X contains NaN.")
+        raise ValueError("Input X contains infinity or a value too large for dtype('float32').")
+    return X
+
+
+class CompiledForest:
+    def __init__(self, path, mmap_mode='r'):
+        """Load exported node arrays, memory-mapped by default"""
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+
+        # Plain ndarray views over the mapping avoid np.memmap subclass overhead on every gather
+        for name in ARRAY_FILES:
+            array = np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mmap_mode)
+            setattr(self, name, np.asarray(array))
+
+        self.classes_ = np.array(meta['classes'])
+        self.n_features_in_ = meta['n_features']
+        self.feature_names_in_ = np.array(meta['feature_names'], dtype=object)
+        self.max_depth = meta['max_depth']
+        self.schema = meta.get('schema')
+        self.version = meta.get('version')
+        self.n_estimators = len(self.roots)
+
+    def apply(self, X):
+        """Return the global leaf index reached in every tree for every sample"""
+        X = np.ascontiguousarray(assert_all_finite(X))
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[:, np.newaxis]
+        nodes = np.repeat(self.roots[np.newaxis, :], X.shape[0], axis=0)
+
+        # Walk all trees in lockstep; leaves are fixed points of the step
+        for _ in range(self.max_depth):
+            go_left = flat_X.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+
+        return nodes
+
+    def predict_proba(self, X):
+        """Average leaf class probabilities over all trees"""
+        leaf_values = self.value[self.apply(X)]
+
+        # Sequential accumulation in tree order, as sklearn does, keeps results bit-identical
+        proba = np.cumsum(leaf_values, axis=1)[:, -1]
+        proba /= self.n_estimators
+        return proba
+
+    def predict(self, X):
+        """Predict the class with the highest averaged probability"""
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python forest_engine.py <MODEL_JOBLIB_OR_BUNDLE> <OUTPUT_DIR>")
+        sys.exit(1)
+
+    import warnings
+
+    import joblib
+    from sklearn.exceptions import InconsistentVersionWarning
+
+    warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+    loaded = joblib.load(sys.argv[1])
+    if isinstance(loaded, dict):
+        # Bundle written by train.py: carry its schema and version along
+        model = loaded['model']
+        schema = {name: loaded[name] for name in ('features', 'manufacturers', 'median_batch')}
+        out_dir = export_forest(model, sys.argv[2], schema, loaded['version'])
+    else:
+        model = loaded
+        out_dir = export_forest(model, sys.argv[2])
+    size = sum(os.path.getsize(os.path.join(out_dir, f)) for f in os.listdir(out_dir))
+    print(f"✅ Exported {model.n_estimators} trees to '{out_dir}' ({size / 1024:.1f} KiB)")
@@ -1,72 +1,376 @@
 # fraud_detector.py
-import joblib
-import pandas as pd
-from PyPDF2 import PdfReader
-import re
+# pandas, PyPDF2, joblib/sklearn and Flask are imported where they are used,
+# so the CLI and short-lived jobs only pay for what they touch
+import numpy as np
+import argparse
+import functools
+import io
+import json
 import sys
+import tarfile
+import tempfile
+import threading
 import os
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import random
+import time
 import warnings
-from sklearn.exceptions import InconsistentVersionWarning
-from flask_cors import CORS
+import zipfile
+from forest_engine import CompiledForest, assert_all_finite, is_compiled_forest
+from amm_fields import FIELD_EXTRACTOR
+from result_cache import ResultCache, model_stat, model_version, sha256_stream
+from record_store import AMMRecordStore
+from amm_index import AMMIndex
+from metrics import (MODEL_LOAD_SECONDS, SlowRequestProfiler, observe_stage, record_outcome,
+                     render_metrics, time_stage)
 
-# Flask imports
-from flask import Flask, request, jsonify
-from werkzeug.utils import secure_filename
+# Features computed from every record, ahead of the manufacturer one-hots
+BASE_FEATURES = [
+    'approval_time',
+    'price_to_cost_ratio',
+    'batch_size_variation',
+    'fast_approval',
+    'clinical_trial_participants',
+    'reported_side_effects'
+]
 
-# Suppress version mismatch warnings
-warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+# Schema of models saved without one (the notebook's bare amm.joblib)
+MANUFACTURERS = [
+    'BioPharm Solutions',
+    'CureAll',
+    'HealthGen',
+    'MediVita',
+    'PharmaCorp'
+]
+FEATURES = BASE_FEATURES + [f'manufacturer_{mfg}' for mfg in MANUFACTURERS]
+MEDIAN_BATCH = 124600.0
+
+# Served by default: amm.joblib exported with forest_engine.export_forest. Identical
+# predictions, but predict_fast stays under a millisecond (p99 ~0.4 ms against ~1.9 ms
+# walking the sklearn trees); any model file or bundle can still be passed instead
+DEFAULT_MODEL = 'amm_forest'
+
+# Dossier attributes taken from the AMM registry (or synthesized as a fallback)
+DOSSIER_FIELDS = [
+    'submission_date',
+    'approval_date',
+    'clinical_trial_participants',
+    'reported_side_effects',
+    'batch_size',
+    'price_per_unit',
+    'production_cost'
+]
+
+# Text extraction budget per document; fields normally sit on page one
+MAX_PDF_PAGES = 10
+MAX_PDF_CHARS = 100_000
+
+# Synthetic record scored once at startup to prove the model works end to end
+SELF_TEST_RECORD = {
+    'amm_number': 'TEST123',
+    'manufacturer': 'Test',
+    'submission_date': '2023-01-01',
+    'approval_date': '2023-02-01',
+    'clinical_trial_participants': 1000,
+    'reported_side_effects': 50,
+    'batch_size': 100000,
+    'price_per_unit': 10.0,
+    'production_cost': 5.0
+}
+
+# Models loaded in this process, shared by every detector
+_MODELS = {}
+_MODELS_LOCK = threading.Lock()
+
+def model_schema(features, median_batch=MEDIAN_BATCH):
+    """Feature order, manufacturer vocabulary and batch median a model was trained with"""
+    features = [str(f) for f in features]
+    return {
+        'features': features,
+        'manufacturers': [f[len('manufacturer_'):] for f in features if f.startswith('manufacturer_')],
+        'median_batch': float(median_batch)
+    }
+
+def base_feature_values(record, approval_time, median_batch):
+    """BASE_FEATURES in order, from one record's scalars or a DataFrame's columns alike
+
+    approval_time is the days from submission to approval, which the caller
+    computes from its own date type.
+    """
+    return [
+        approval_time,
+        record['price_per_unit'] / record['production_cost'],
+        record['batch_size'] / median_batch,
+        approval_time < 30,
+        record['clinical_trial_participants'],
+        record['reported_side_effects']
+    ]
+
+def fill_missing(df, median_batch):
+    """Fill the gaps training fills: unknown manufacturer and median batch size"""
+    df['manufacturer'] = df['manufacturer'].fillna('Unknown')
+    df['batch_size'] = df['batch_size'].fillna(median_batch)
+    return df
+
+def coerce_raw(df):
+    """Parse the date and numeric columns, turning unparseable values into NaT/NaN"""
+    import pandas as pd
+
+    for column in ('submission_date', 'approval_date'):
+        df[column] = pd.to_datetime(df[column], errors='coerce')
+    for column in ('clinical_trial_participants', 'reported_side_effects', 'batch_size',
+                   'price_per_unit', 'production_cost'):
+        df[column] = pd.to_numeric(df[column], errors='coerce')
+    return df
+
+def engineer_features(df, median_batch, manufacturers):
+    """Add engineered feature columns to a DataFrame of raw records"""
+    import pandas as pd
+
+    # Feature engineering (shared by training and serving)
+    df['submission_date'] = pd.to_datetime(df['submission_date'])
+    df['approval_date'] = pd.to_datetime(df['approval_date'])
+    approval_time = (df['approval_date'] - df['submission_date']).dt.days
+    for name, values in zip(BASE_FEATURES, base_feature_values(df, approval_time, median_batch)):
+        df[name] = values
+    df['fast_approval'] = df['fast_approval'].astype(int)
+
+    # One-hot encode manufacturers
+    for mfg in manufacturers:
+        df[f'manufacturer_{mfg}'] = (df['manufacturer'] == mfg).astype(int)
+
+    return df
+
+def _load_joblib(model_path):
+    """Load a training bundle or bare estimator; returns (model, version, schema)"""
+    import joblib
+    from sklearn.exceptions import InconsistentVersionWarning
+
+    # Suppress version mismatch warnings
+    warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+    with warnings.catch_warnings():
+        # mmap_mode only applies to uncompressed pickles; amm.joblib is compressed
+        warnings.filterwarnings("ignore", message='mmap_mode')
+        loaded = joblib.load(model_path, mmap_mode='r')
+
+    if isinstance(loaded, dict):
+        # Bundle written by train.py
+        model = loaded['model']
+        schema = model_schema(loaded['features'], loaded['median_batch'])
+        if schema['manufacturers'] != list(loaded['manufacturers']):
+            raise ValueError("Bundle manufacturers do not match its feature order")
+        version = loaded['version']
+    else:
+        model = loaded
+        schema = model_schema(getattr(model, 'feature_names_in_', FEATURES))
+        version = model_version(model_path)
+
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None and list(names) != schema['features']:
+        raise ValueError("Model features do not match the bundled feature order")
+    return model, version, schema
+
+def load_model(model_path):
+    """Load a model once per process; returns (model, version, schema)"""
+    # Keyed by the files' mtime and size too, so a replaced file or re-exported forest
+    # is picked up by new detectors and the old copy is released
+    path = os.path.abspath(model_path)
+    stat = model_stat(model_path)
+    with _MODELS_LOCK:
+        cached = _MODELS.get(path)
+        if cached is None or cached[0] != stat:
+            start = time.perf_counter()
+            if is_compiled_forest(model_path):
+                model = CompiledForest(model_path)
+                schema = model.schema or model_schema(list(model.feature_names_in_) or FEATURES)
+                loaded = (model, model.version or model_version(model_path), schema)
+            else:
+                loaded = _load_joblib(model_path)
+            _MODELS[path] = cached = (stat, loaded)
+            MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+        return cached[1]
 
 class PharmaFraudDetector:
-    def __init__(self, model_path='amm.joblib'):
-        """Initialize with trained model"""
+    def __init__(self, model_path=DEFAULT_MODEL, max_pages=MAX_PDF_PAGES, max_chars=MAX_PDF_CHARS, cache=None,
+                 record_store=None, loaded_model=None, identifier_index=None):
+        """Initialize with trained model (joblib pickle or compiled forest directory)
+
+        loaded_model is a (model, version, schema) tuple from load_model, for a
+        model already loaded and validated by a parent process.
+        """
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.cache = cache  # Optional ResultCache keyed by model version and PDF SHA-256
+        if isinstance(record_store, (str, os.PathLike)):
+            record_store = AMMRecordStore(record_store)
+        self.record_store = record_store  # Optional AMMRecordStore of real dossiers
+        if isinstance(identifier_index, (str, os.PathLike)):
+            identifier_index = AMMIndex(identifier_index, create=False)
+        self.identifier_index = identifier_index  # Optional AMMIndex of registered AMM and lot numbers
         try:
-            self.model = joblib.load(model_path)
-            self.median_batch = 124600.0  # From your training data
+            self.model, self.model_version, schema = loaded_model or load_model(model_path)
+            self._apply_schema(schema)
             print("✅ Model loaded successfully")
         except Exception as e:
             raise ValueError(f"Model loading failed: {str(e)}")
 
+    def _apply_schema(self, schema):
+        """Take feature order, vocabulary and batch median from the model's training schema"""
+        self.features = schema['features']
+        self.manufacturers = schema['manufacturers']
+        self.median_batch = schema['median_batch']
+        # Row positions of each base feature and manufacturer flag, for predict_fast
+        self.base_columns = [self.features.index(name) for name in BASE_FEATURES]
+        self.manufacturer_index = {mfg: self.features.index(f'manufacturer_{mfg}') for mfg in self.manufacturers}
+
+    def self_test(self):
+        """Score SELF_TEST_RECORD and return a health report"""
+        start = time.perf_counter()
+        try:
+            self.predict_fast(SELF_TEST_RECORD)
+        except Exception as e:
+            return {"status": "unhealthy", "error": str(e)}
+        return {
+            "status": "healthy",
+            "model_loaded": True,
+            "api_version": "1.0",
+            "model_version": self.model_version,
+            "self_test_ms": round((time.perf_counter() - start) * 1000, 3),
+            "checked_at": datetime.now().isoformat(timespec='seconds')
+        }
+
     def validate_amm_format(self, text):
         """Validate AMM document format and required fields"""
-        required_fields = {
-            'Numéro AMM': r'Numéro AMM:\s*([A-Z0-9-]+)',
-            'Médicament': r'Médicament:\s*([^\n]+)',
-            'Substance Active': r'Substance Active:\s*([^\n]+)',
-            'Forme Pharmaceutique': r'Forme Pharmaceutique:\s*([^\n]+)',
-            'Date Fabrication': r'Date Fabrication:\s*(\d{4}-\d{2}-\d{2})',
-            'Date Péremption': r'Date Péremption:\s*(\d{4}-\d{2}-\d{2})',
-            'Fabricant': r'Fabricant:\s*([^\n]+)',
-            'Numéro de Lot': r'Numéro de Lot:\s*([^\n]+)'
-        }
-        
-        missing_fields = []
-        extracted_data = {}
-        
-        for field, pattern in required_fields.items():
-            match = re.search(pattern, text)
-            if not match:
-                missing_fields.append(field)
-            else:
-                extracted_data[field] = match.group(1).strip()
+        extracted_data = FIELD_EXTRACTOR.extract(text)
+        missing_fields = FIELD_EXTRACTOR.missing(extracted_data)
         
         if missing_fields:
             raise ValueError(f"Missing required fields: {', '.join(missing_fields)}")
             
         return extracted_data
 
-    def process_pdf(self, pdf_path):
-        """Extract and validate data from AMM PDF"""
-        if not os.path.exists(pdf_path):
-            raise FileNotFoundError(f"PDF file not found at {pdf_path}")
-        
+    def _extract_pages(self, reader):
+        """Read pages until every required field is found or the budget runs out"""
+        extracted_data = {}
+        pages_read = 0
+        chars_read = 0
+        extraction_time = validation_time = 0.0
+
+        for page in reader.pages:
+            if pages_read == self.max_pages:
+                break
+
+            start = time.perf_counter()
+            page_text = page.extract_text() or ''
+            extraction_time += time.perf_counter() - start
+            pages_read += 1
+            chars_read += len(page_text)
+            if chars_read > self.max_chars:
+                raise ValueError(f"Document text exceeds the {self.max_chars} character budget")
+
+            start = time.perf_counter()
+            FIELD_EXTRACTOR.extract(page_text, extracted_data)
+            complete = not FIELD_EXTRACTOR.missing(extracted_data)
+            validation_time += time.perf_counter() - start
+            if complete:
+                break
+
+        # One observation per document, however many pages it took
+        observe_stage('pdf_extraction', extraction_time)
+        observe_stage('field_validation', validation_time)
+
+        missing_fields = FIELD_EXTRACTOR.missing(extracted_data)
+        if missing_fields:
+            raise ValueError(
+                f"Missing required fields: {', '.join(missing_fields)} "
+                f"(searched {pages_read} page(s))"
+            )
+
+        return extracted_data, pages_read
+
+    def process_pdf(self, pdf):
+        """Extract and validate data from an AMM PDF path, bytes or binary stream"""
+        if isinstance(pdf, (str, os.PathLike)):
+            if not os.path.exists(pdf):
+                raise FileNotFoundError(f"PDF file not found at {pdf}")
+            with open(pdf, 'rb') as f:
+                return self._process_pdf_stream(f)
+
+        if isinstance(pdf, (bytes, bytearray, memoryview)):
+            pdf = io.BytesIO(pdf)
+
+        return self._process_pdf_stream(pdf)
+
+    def document_key(self, stream):
+        """Cache key for a PDF stream: model version plus content SHA-256"""
+        return f"{self.model_version}:{sha256_stream(stream)}"
+
+    def validate_pdf(self, stream, extract=None):
+        """Extract and score a PDF stream, reusing cached results for identical bytes"""
+        key = None
+        if self.cache is not None:
+            key = self.document_key(stream)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        extracted_data = (extract or self.process_pdf)(stream)
+        if 'rejection' in extracted_data:
+            # Not cached: the identifier may be registered later
+            return self.rejected_result(extracted_data)
+
+        validation_result = self.predict_fast(extracted_data)
+        result = {
+            'status': validation_result['status'],
+            'probability': validation_result['probability'],
+            'extracted_data': extracted_data,
+            'engineered_features': validation_result['engineered_features'],
+            'model_version': self.model_version
+        }
+
+        self.cache_result(key, result)
+        return result
+
+    def cache_result(self, key, result):
+        """Store a scored result under its document key, unless the dossier was synthesized"""
+        # A synthetic dossier is a random draw: caching it would pin a random verdict
+        # and hide a later registry import of the same AMM number
+        if key is None or result['extracted_data'].get('record_source') == 'synthetic':
+            return
+        self.cache.put(key, result)
+
+    def rejected_result(self, extracted_data):
+        """Validation result of a document rejected by the identifier index"""
+        return {
+            'status': 'FRAUD',
+            'probability': 1.0,
+            'rejection': extracted_data['rejection'],
+            'extracted_data': extracted_data,
+            'model_version': self.model_version
+        }
+
+    def _process_pdf_stream(self, stream):
+        """Extract and validate data from a seekable binary PDF stream"""
+        from PyPDF2 import PdfReader
+
         try:
-            with open(pdf_path, 'rb') as f:
-                text = "\n".join([page.extract_text() for page in PdfReader(f).pages])
-            
-            # Validate AMM format and extract data
-            extracted_data = self.validate_amm_format(text)
+            # Validate AMM format and extract data, stopping once every field is found
+            extracted_data, pages_read = self._extract_pages(PdfReader(stream))
+
+            # Unregistered AMM numbers and reused lot numbers need no further checks or scoring
+            if self.identifier_index is not None:
+                with time_stage('identifier_check'):
+                    rejection = self.identifier_index.check(extracted_data['Numéro AMM'],
+                                                            extracted_data.get('Numéro de Lot'))
+                if rejection is not None:
+                    return {
+                        'amm_number': extracted_data['Numéro AMM'],
+                        'product_name': extracted_data['Médicament'],
+                        'manufacturer': extracted_data['Fabricant'],
+                        'lot_number': extracted_data.get('Numéro de Lot'),
+                        'pages_read': pages_read,
+                        'rejection': rejection
+                    }
             
             # Additional validation rules
             fab_date = datetime.strptime(extracted_data['Date Fabrication'], '%Y-%m-%d')
@@ -76,93 +380,290 @@ class PharmaFraudDetector:
             if (exp_date - fab_date).days < 365 or (exp_date - fab_date).days > 1825:
                 raise ValueError("Invalid expiration date range")
             
-            # Generate synthetic data for missing fields
             manufacturer = extracted_data['Fabricant']
-            submission_date = (fab_date - timedelta(days=random.randint(60, 180))).strftime('%Y-%m-%d')
-            approval_date = (fab_date - timedelta(days=random.randint(30, 60))).strftime('%Y-%m-%d')
-            
-            # Generate clinical data based on product type
-            participants = random.randint(800, 2000)
-            side_effects = random.randint(5, int(participants * 0.1))
-            
-            # Generate production data
-            batch_size = random.choice([50000, 100000, 150000, 200000])
-            production_cost = round(random.uniform(5.0, 15.0), 2)
-            price = round(production_cost * random.uniform(3.0, 8.0), 2)
+
+            # Real dossier attributes from the AMM registry when the number is known
+            record = None
+            if self.record_store is not None:
+                record = self.record_store.get(extracted_data['Numéro AMM'])
+
+            if record is not None:
+                dossier = {name: record[name] for name in DOSSIER_FIELDS}
+                record_source = 'registry'
+            else:
+                dossier = self._synthesize_dossier(fab_date)
+                record_source = 'synthetic'
             
             return {
                 'amm_number': extracted_data['Numéro AMM'],
                 'product_name': extracted_data['Médicament'],
                 'manufacturer': manufacturer,
-                'submission_date': submission_date,
-                'approval_date': approval_date,
-                'clinical_trial_participants': participants,
-                'reported_side_effects': side_effects,
-                'batch_size': batch_size,
-                'price_per_unit': price,
-                'production_cost': production_cost
+                **dossier,
+                'record_source': record_source,
+                'origin_country': extracted_data.get("Pays d'Origine"),
+                'storage_conditions': extracted_data.get('Conditions de Conservation'),
+                'pages_read': pages_read
             }
         except Exception as e:
             raise ValueError(f"PDF processing error: {str(e)}")
     
+    def _engineer_features(self, df):
+        """Add engineered feature columns to a DataFrame of raw records"""
+        return engineer_features(df, self.median_batch, self.manufacturers)
+
     def predict(self, data):
         """Run fraud prediction with feature engineering"""
+        return self.predict_batch([data])[0]
+
+    def _synthesize_dossier(self, fab_date):
+        """Random dossier attributes, used only when the registry has no record"""
+        submission_date = (fab_date - timedelta(days=random.randint(60, 180))).strftime('%Y-%m-%d')
+        approval_date = (fab_date - timedelta(days=random.randint(30, 60))).strftime('%Y-%m-%d')
+        
+        # Generate clinical data based on product type
+        participants = random.randint(800, 2000)
+        side_effects = random.randint(5, int(participants * 0.1))
+        
+        # Generate production data
+        batch_size = random.choice([50000, 100000, 150000, 200000])
+        production_cost = round(random.uniform(5.0, 15.0), 2)
+        price = round(production_cost * random.uniform(3.0, 8.0), 2)
+
+        return {
+            'submission_date': submission_date,
+            'approval_date': approval_date,
+            'clinical_trial_participants': participants,
+            'reported_side_effects': side_effects,
+            'batch_size': batch_size,
+            'price_per_unit': price,
+            'production_cost': production_cost
+        }
+
+    def predict_fast(self, data):
+        """Run fraud prediction on one record without pandas
+
+        Sub-millisecond with a compiled forest (DEFAULT_MODEL); a joblib model
+        gives the same result but walks the sklearn trees at roughly 1-2 ms.
+        """
         try:
-            df = pd.DataFrame([data])
-            
-            # Feature engineering (must match training)
-            df['submission_date'] = pd.to_datetime(df['submission_date'])
-            df['approval_date'] = pd.to_datetime(df['approval_date'])
-            df['approval_time'] = (df['approval_date'] - df['submission_date']).dt.days
-            df['price_to_cost_ratio'] = df['price_per_unit'] / df['production_cost']
-            df['batch_size_variation'] = df['batch_size'] / self.median_batch
-            df['fast_approval'] = (df['approval_time'] < 30).astype(int)
-            
-            # One-hot encode manufacturers
-            manufacturers = [
-                'BioPharm Solutions',
-                'CureAll', 
-                'HealthGen',
-                'MediVita',
-                'PharmaCorp'
-            ]
-            for mfg in manufacturers:
-                df[f'manufacturer_{mfg}'] = (df['manufacturer'] == mfg).astype(int)
-            
-            # Required features
-            features = [
-                'approval_time',
-                'price_to_cost_ratio',
-                'batch_size_variation',
-                'fast_approval',
-                'clinical_trial_participants',
-                'reported_side_effects'
-            ] + [f'manufacturer_{mfg}' for mfg in manufacturers]
-            
-            # Make prediction
-            proba = self.model.predict_proba(df[features])[0][1]
-            is_fraud = self.model.predict(df[features])[0]
-            
+            with time_stage('feature_engineering'):
+                approval_time = (
+                    date.fromisoformat(str(data['approval_date']))
+                    - date.fromisoformat(str(data['submission_date']))
+                ).days
+
+                # Preallocated feature row in training order
+                values = base_feature_values(data, approval_time, self.median_batch)
+                row = np.zeros((1, len(self.features)))
+                row[0, self.base_columns] = values
+                mfg_column = self.manufacturer_index.get(data['manufacturer'])
+                if mfg_column is not None:
+                    row[0, mfg_column] = 1
+
+            with time_stage('model_inference'):
+                proba = self.predict_proba_features(row)[0]
+
             return {
-                'status': "FRAUD" if is_fraud else "VALID",
-                'probability': float(proba),
+                'status': "FRAUD" if self.model.classes_[proba.argmax()] else "VALID",
+                'probability': float(proba[1]),
                 'engineered_features': {
-                    'approval_days': int(df['approval_time'].iloc[0]),
-                    'price_ratio': round(df['price_to_cost_ratio'].iloc[0], 1),
-                    'batch_variation': round(df['batch_size_variation'].iloc[0], 2),
-                    'is_fast_track': bool(df['fast_approval'].iloc[0])
+                    'approval_days': int(approval_time),
+                    'price_ratio': round(values[1], 1),
+                    'batch_variation': round(values[2], 2),
+                    'is_fast_track': bool(values[3])
                 }
             }
         except Exception as e:
             raise ValueError(f"Prediction error: {str(e)}")
+
+    def predict_proba_features(self, X):
+        """Class probabilities of engineered feature rows in self.features order
+
+        Same result as model.predict_proba, without sklearn's per-call overhead.
+        """
+        if isinstance(self.model, CompiledForest):
+            return self.model.predict_proba(X)
+
+        # Mirrors RandomForestClassifier.predict_proba step by step so the
+        # result is bit-identical, minus feature-name checks and joblib dispatch
+        X = np.ascontiguousarray(assert_all_finite(X))
+        n_classes = len(self.model.classes_)
+        proba = np.zeros((X.shape[0], n_classes))
+        for estimator in self.model.estimators_:
+            tree_proba = estimator.tree_.predict(X)[:, :n_classes]
+            normalizer = tree_proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            proba += tree_proba / normalizer
+        proba /= len(self.model.estimators_)
+        return proba
+
+    def predict_batch(self, records):
+        """Run fraud prediction on many records with a single model call"""
+        if not records:
+            return []
+
+        import pandas as pd
+
+        try:
+            df, proba = self._predict_frame(pd.DataFrame(list(records)))
+            labels = self.model.classes_[proba.argmax(axis=1)]
+            fraud_proba = proba[:, 1]
+
+            approval_time = df['approval_time'].to_numpy()
+            price_ratio = df['price_to_cost_ratio'].to_numpy()
+            batch_variation = df['batch_size_variation'].to_numpy()
+            fast_approval = df['fast_approval'].to_numpy()
+
+            return [
+                {
+                    'status': "FRAUD" if labels[i] else "VALID",
+                    'probability': float(fraud_proba[i]),
+                    'engineered_features': {
+                        'approval_days': int(approval_time[i]),
+                        'price_ratio': round(price_ratio[i], 1),
+                        'batch_variation': round(batch_variation[i], 2),
+                        'is_fast_track': bool(fast_approval[i])
+                    }
+                }
+                for i in range(len(df))
+            ]
+        except Exception as e:
+            raise ValueError(f"Prediction error: {str(e)}")
+
+    def predict_each(self, records):
+        """Score records one at a time; a record that fails yields its exception in place of a result"""
+        results = []
+        for record in records:
+            try:
+                results.append(self.predict_fast(record))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    def _predict_frame(self, df):
+        """Engineer features on a DataFrame of raw records and score it in one model call"""
+        with time_stage('feature_engineering'):
+            df = self._engineer_features(df)
+
+        # One predict_proba call; the label is the argmax, exactly as model.predict does.
+        # Non-finite features are rejected up front, so both model backends fail alike
+        # (recent sklearn versions would route NaN down a tree instead)
+        with time_stage('model_inference'):
+            X = df[self.features]
+            assert_all_finite(X)
+            proba = self.model.predict_proba(X)
+        return df, proba
+
+    def score_frame(self, df):
+        """Score a pharma_amm_data.csv-shaped DataFrame; returns one prediction row per record
+
+        Gaps are filled as in training. A row whose features still cannot be computed
+        gets an 'error' instead of a prediction, so one bad record never stops a bulk job.
+        """
+        import pandas as pd
+
+        try:
+            # Same missing-value handling as train.py and feature_store.py
+            df = fill_missing(coerce_raw(df.copy()), self.median_batch)
+
+            with time_stage('feature_engineering'):
+                df = self._engineer_features(df)
+                X = df[self.features].to_numpy(dtype=np.float32)
+            predicted, probability, error = self.score_features(X)
+
+            scored = pd.DataFrame({
+                'amm_number': df['amm_number'],
+                'predicted': predicted,
+                'probability': probability
+            }, index=df.index)
+            if 'is_fraud' in df:
+                scored['actual'] = df['is_fraud']
+            scored['error'] = error
+            return scored
+        except Exception as e:
+            raise ValueError(f"Prediction error: {str(e)}")
+
+    def score_features(self, X):
+        """Score a feature matrix in self.features order; returns (predicted, probability, error)
+
+        Rows with missing or infinite features are left unscored (<NA> label, NaN
+        probability) and their error names the offending features; others get ''.
+        """
+        import pandas as pd
+
+        finite = np.isfinite(X)
+        valid = finite.all(axis=1)
+
+        predicted = pd.array([pd.NA] * len(X), dtype='Int64')
+        probability = np.full(len(X), np.nan)
+        if valid.any():
+            with time_stage('model_inference'):
+                proba = self.predict_proba_features(X[valid])
+            predicted[valid] = self.model.classes_[proba.argmax(axis=1)]
+            probability[valid] = proba[:, 1]
+
+        error = np.full(len(X), '', dtype=object)
+        features = np.array(self.features)
+        error[~valid] = [f"Missing or invalid features: {', '.join(features[~row])}" for row in finite[~valid]]
+        return predicted, probability, error
+
+
+# Detector of a bulk scoring worker process, loaded once by _init_bulk_worker
+_BULK_DETECTOR = None
+
+def _init_bulk_worker(model_path):
+    global _BULK_DETECTOR
+    _BULK_DETECTOR = PharmaFraudDetector(model_path)
+
+def _score_chunk(chunk):
+    return _BULK_DETECTOR.score_frame(chunk)
+
+def score_csv(input_path, output_path, chunk_size=100_000, processes=1, model_path='amm.joblib'):
+    """Stream a CSV through the model chunk by chunk, appending predictions to output_path"""
+    import pandas as pd
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+    import multiprocessing
+
+    start = time.perf_counter()
+    rows = 0
+    errors = 0
+    chunks = pd.read_csv(input_path, chunksize=chunk_size)
+
+    with open(output_path, 'w', newline='') as out:
+        def write(scored):
+            nonlocal rows, errors
+            scored.to_csv(out, header=rows == 0, index=False)
+            out.flush()
+            rows += len(scored)
+            errors += int((scored['error'] != '').sum())
+
+        if processes <= 1:
+            detector = PharmaFraudDetector(model_path)
+            for chunk in chunks:
+                write(detector.score_frame(chunk))
+        else:
+            # At most two chunks in flight per process keeps memory flat on any file size
+            with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_bulk_worker, initargs=(model_path,)) as executor:
+                pending = deque()
+                for chunk in chunks:
+                    if len(pending) == 2 * processes:
+                        write(pending.popleft().result())
+                    pending.append(executor.submit(_score_chunk, chunk))
+                while pending:
+                    write(pending.popleft().result())
+
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'errors': errors, 'seconds': seconds, 'rows_per_second': rows / seconds if seconds else 0.0}
         
-def main(pdf_path):
+def main(pdf_path, records_path=None, model_path=DEFAULT_MODEL, max_pages=MAX_PDF_PAGES, max_chars=MAX_PDF_CHARS):
     """Run the full detection pipeline"""
     print(f"\n⚕️ Pharmaceutical Fraud Detection System")
     print(f"Processing: {os.path.basename(pdf_path)}")
     
     try:
-        detector = PharmaFraudDetector()
+        detector = PharmaFraudDetector(model_path, max_pages, max_chars, record_store=records_path)
         
         # Step 1: Extract data
         print("\n🔍 Extracting PDF data...")
@@ -174,7 +675,7 @@ def main(pdf_path):
         
         # Step 2: Predict
         print("\n🔄 Analyzing for fraud...")
-        result = detector.predict(data)
+        result = detector.predict_fast(data)
         
         # Step 3: Display results
         print("\n🔎 Fraud Analysis Results:")
@@ -191,104 +692,417 @@ def main(pdf_path):
         print(f"\n❌ Error: {str(e)}")
         sys.exit(1)
 
-def create_flask_app():
+# Upload types the PDF endpoints accept
+ALLOWED_EXTENSIONS = {'pdf'}
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def error_status(e):
+    """HTTP status for an extraction or scoring failure"""
+    from pdf_workers import PoolSaturated
+
+    if isinstance(e, PoolSaturated):
+        return 503
+    if isinstance(e, TimeoutError):
+        return 504
+    return 500
+
+def create_flask_app(pdf_workers=0, task_timeout=30.0, max_queue=32, cache_size=1024, cache_db=None,
+                     cache_ttl=7 * 24 * 3600, records_path=None, profile_slowest=0, profile_dir='profiles',
+                     model_path=DEFAULT_MODEL, loaded_model=None, index_path=None, jobs_db=None, job_workers=2,
+                     max_pages=MAX_PDF_PAGES, max_chars=MAX_PDF_CHARS):
     """Create and configure the Flask application"""
+    # Flask imports
+    from flask import Flask, Request, Response, current_app, request, jsonify
+    from flask_cors import CORS
+    from pdf_workers import PDFWorkerPool
+    from job_queue import JobRunner, JobStore, read_archive
+
+    class SpoolingRequest(Request):
+        """Request that keeps uploads in memory up to UPLOAD_SPOOL_SIZE bytes"""
+
+        def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+            # Anonymous temp file past the limit, so concurrent uploads never share a path
+            return tempfile.SpooledTemporaryFile(max_size=current_app.config['UPLOAD_SPOOL_SIZE'], mode='rb+')
+
     app = Flask(__name__)
+    app.request_class = SpoolingRequest
     CORS(app)  # This will enable CORS for all routes
     # Configuration
-    UPLOAD_FOLDER = 'uploads'
-    ALLOWED_EXTENSIONS = {'pdf'}
-    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = 32 * 1024 * 1024  # Rejected with 413 before the body is read
+    app.config['UPLOAD_SPOOL_SIZE'] = 2 * 1024 * 1024  # Larger uploads spool to an anonymous temp file
+    app.config['PDF_WORKERS'] = pdf_workers  # 0 parses PDFs in the request thread
+    app.config['PDF_TASK_TIMEOUT'] = task_timeout
+    app.config['PDF_MAX_QUEUE'] = max_queue
+    app.config['PDF_MAX_PAGES'] = max_pages  # Text extraction budget per document
+    app.config['PDF_MAX_CHARS'] = max_chars
+    
+    app.config['RESULT_CACHE_SIZE'] = cache_size  # 0 disables result caching
+    app.config['RESULT_CACHE_DB'] = cache_db  # Optional SQLite file shared across restarts
+    app.config['RESULT_CACHE_TTL'] = cache_ttl
+    app.config['AMM_RECORDS_DB'] = records_path  # Registry of real dossiers; None synthesizes them
+    app.config['AMM_INDEX'] = index_path  # Identifier index built with amm_index.py; None skips the check
+    app.config['PROFILE_SLOWEST'] = profile_slowest  # 0 disables the cProfile hook
+    app.config['PROFILE_DIR'] = profile_dir
+    app.config['JOBS_DB'] = jobs_db  # SQLite queue behind /jobs; None disables the job API
+    app.config['JOB_WORKERS'] = job_workers  # Dedicated worker processes for jobs, 0 = one background thread
+    app.config['JOB_MAX_CONTENT_LENGTH'] = 2 * 1024 * 1024 * 1024  # Archives far exceed single uploads
+    app.config['JOB_MAX_FILES'] = 50_000
     
     # Initialize the fraud detector
-    detector = PharmaFraudDetector()
+    cache = ResultCache(cache_size, cache_db, cache_ttl) if cache_size else None
+    detector = PharmaFraudDetector(model_path, max_pages, max_chars, cache=cache, record_store=records_path,
+                                   loaded_model=loaded_model, identifier_index=index_path)
+    health = detector.self_test()
+
+    # Opt-in: keep cProfile dumps of the slowest validation requests
+    profiler = SlowRequestProfiler(profile_slowest, profile_dir) if profile_slowest else None
+
+    # Optional process pool so CPU-bound PDF parsing uses every core
+    pool = None
+    if pdf_workers:
+        pool = PDFWorkerPool(pdf_workers, model_path, task_timeout=task_timeout, max_queue=max_queue,
+                             records_path=records_path, index_path=index_path, max_pages=max_pages,
+                             max_chars=max_chars)
+        app.extensions['pdf_worker_pool'] = pool
+
+    # Background jobs get their own workers, so a large archive never queues ahead of /validate_amm
+    jobs = None
+    if jobs_db:
+        jobs = JobStore(jobs_db)
+        job_pool = None
+        if job_workers:
+            job_pool = PDFWorkerPool(job_workers, model_path, task_timeout=task_timeout, max_queue=job_workers,
+                                     records_path=records_path, index_path=index_path, max_pages=max_pages,
+                                     max_chars=max_chars)
+            app.extensions['job_worker_pool'] = job_pool
+        runner = JobRunner(
+            jobs, detector,
+            extract=(lambda stream: job_pool.process_pdf(stream.read())) if job_pool is not None else None,
+            parallelism=job_workers or 1
+        )
+        runner.start()
+        app.extensions['job_runner'] = runner
 
-    def allowed_file(filename):
-        return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    def extract_upload(stream):
+        """Run process_pdf on an upload stream, on a worker process when the pool is enabled"""
+        if pool is not None:
+            return pool.process_pdf(stream.read())
+        return detector.process_pdf(stream)
 
     @app.route('/health')
     def health_check():
-        try:
-            # Verify model is loaded by making a dummy prediction
-            dummy_data = {
-                'amm_number': 'TEST123',
-                'manufacturer': 'Test',
-                'submission_date': '2023-01-01',
-                'approval_date': '2023-02-01',
-                'clinical_trial_participants': 1000,
-                'reported_side_effects': 50,
-                'batch_size': 100000,
-                'price_per_unit': 10.0,
-                'production_cost': 5.0
-            }
-            result = detector.predict(dummy_data)
-            return jsonify({
-                "status": "healthy",
-                "model_loaded": True,
-                "api_version": "1.0"
-            }), 200
-        except Exception as e:
-            return jsonify({
-                "status": "unhealthy",
-                "error": str(e)
-            }), 500
+        # Cached startup self-test: probes never touch the model
+        status = 200 if health['status'] == 'healthy' else 500
+        return jsonify({**health, "cache": cache.stats() if cache is not None else None}), status
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    @app.errorhandler(413)
+    def request_too_large(e):
+        limit = app.config['MAX_CONTENT_LENGTH']
+        return jsonify({'error': f'Upload exceeds the {limit} byte limit'}), 413
+
+    def profiled(view):
+        """Route view through the slow-request profiler when it is enabled"""
+        if profiler is None:
+            return view
+        return functools.wraps(view)(lambda: profiler.run(view.__name__, view))
 
     @app.route('/validate_amm', methods=['POST'])
+    @profiled
     def validate_amm():
         """Endpoint for validating AMM PDFs"""
-        if 'file' not in request.files:
+        with time_stage('upload_read'):
+            files = request.files
+
+        if 'file' not in files:
             return jsonify({'error': 'No file part'}), 400
         
-        file = request.files['file']
+        file = files['file']
         
         if file.filename == '':
             return jsonify({'error': 'No selected file'}), 400
         
         if file and allowed_file(file.filename):
-            filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
             try:
-                # Process and validate the PDF
-                extracted_data = detector.process_pdf(filepath)
-                validation_result = detector.predict(extracted_data)
-                
-                # Clean up the uploaded file
-                os.remove(filepath)
-                
-                return jsonify({
-                    'status': validation_result['status'],
-                    'probability': validation_result['probability'],
-                    'extracted_data': extracted_data,
-                    'engineered_features': validation_result['engineered_features']
-                })
+                # Process and validate the PDF; identical bytes are served from the cache
+                result = detector.validate_pdf(file.stream, extract_upload)
+                record_outcome(result)
+                return jsonify(result)
                 
             except Exception as e:
-                # Clean up the uploaded file if something went wrong
-                if os.path.exists(filepath):
-                    os.remove(filepath)
-                return jsonify({'error': str(e)}), 500
+                record_outcome(e)
+                return jsonify({'error': str(e)}), error_status(e)
         
         return jsonify({'error': 'Invalid file type'}), 400
 
+    @app.route('/validate_amm_batch', methods=['POST'])
+    @profiled
+    def validate_amm_batch():
+        """Endpoint for validating many AMM PDFs in one request"""
+        with time_stage('upload_read'):
+            files = request.files.getlist('files')
+        if not files:
+            return jsonify({'error': 'No file part'}), 400
+
+        # Extract every PDF first, keeping per-file errors in place
+        results = []
+        accepted = []
+        for file in files:
+            result = {'filename': file.filename}
+            results.append(result)
+
+            if file.filename == '':
+                result['error'] = 'No selected file'
+            elif not allowed_file(file.filename):
+                result['error'] = 'Invalid file type'
+            else:
+                # Documents seen before skip parsing and scoring entirely
+                key = detector.document_key(file.stream) if cache is not None else None
+                cached = cache.get(key) if key is not None else None
+                if cached is not None:
+                    result.update(cached)
+                else:
+                    accepted.append((result, file, key))
+
+        if pool is not None:
+            extracted = pool.process_many([file.read() for _, file, _ in accepted])
+        else:
+            extracted = []
+            for _, file, _ in accepted:
+                try:
+                    extracted.append(detector.process_pdf(file.stream))
+                except Exception as e:
+                    extracted.append(e)
+
+        pending = []
+        for (result, _, key), data in zip(accepted, extracted):
+            if isinstance(data, Exception):
+                result['error'] = str(data)
+            elif 'rejection' in data:
+                result.update(detector.rejected_result(data))
+            else:
+                result['extracted_data'] = data
+                pending.append((result, key))
+
+        # Score all successfully extracted documents in one model call
+        if pending:
+            records = [r['extracted_data'] for r, _ in pending]
+            try:
+                predictions = detector.predict_batch(records)
+            except Exception:
+                # Score one by one so a single bad record only fails its own file
+                predictions = detector.predict_each(records)
+
+            for (result, key), prediction in zip(pending, predictions):
+                if isinstance(prediction, Exception):
+                    result['error'] = str(prediction)
+                    continue
+                result['status'] = prediction['status']
+                result['probability'] = prediction['probability']
+                result['engineered_features'] = prediction['engineered_features']
+                result['model_version'] = detector.model_version
+                detector.cache_result(key, {k: v for k, v in result.items() if k != 'filename'})
+
+        for result in results:
+            record_outcome(result)
+        return jsonify({'results': results})
+
+    @app.route('/jobs', methods=['POST'])
+    def submit_job():
+        """Queue an archive (zip/tar) or a list of PDFs for background validation"""
+        if jobs is None:
+            return jsonify({'error': 'Job API is disabled (start the server with --jobs-db)'}), 404
+
+        request.max_content_length = app.config['JOB_MAX_CONTENT_LENGTH']
+        with time_stage('upload_read'):
+            files = request.files
+
+        try:
+            if 'archive' in files:
+                pdfs = read_archive(files['archive'].stream, app.config['JOB_MAX_FILES'])
+            elif 'files' in files:
+                uploads = files.getlist('files')
+                if len(uploads) > app.config['JOB_MAX_FILES']:
+                    return jsonify({'error': f"More than {app.config['JOB_MAX_FILES']} files"}), 400
+                invalid = [f.filename for f in uploads if not allowed_file(f.filename)]
+                if invalid:
+                    return jsonify({'error': f"Invalid file type: {', '.join(invalid)}"}), 400
+                pdfs = ((f.filename, f.read()) for f in uploads)
+            else:
+                return jsonify({'error': 'No archive or files part'}), 400
+            job_id = jobs.submit(pdfs)
+        except (ValueError, zipfile.BadZipFile, tarfile.TarError) as e:
+            # Corrupt archives surface while the members are read
+            return jsonify({'error': str(e)}), 400
+
+        runner.notify()
+        return jsonify({
+            **jobs.status(job_id),
+            'status_url': f'/jobs/{job_id}',
+            'results_url': f'/jobs/{job_id}/results'
+        }), 202
+
+    @app.route('/jobs/<job_id>')
+    def job_status(job_id):
+        status = jobs.status(job_id) if jobs is not None else None
+        if status is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        return jsonify(status)
+
+    @app.route('/jobs/<job_id>/results')
+    def job_results(job_id):
+        """NDJSON results in completion order; follows a running job unless ?follow=0"""
+        if jobs is None or jobs.status(job_id) is None:
+            return jsonify({'error': 'Unknown job'}), 404
+        follow = request.args.get('follow', '1') != '0'
+
+        def stream():
+            sent = 0
+            while True:
+                # Status first, so rows finished in between are still sent before stopping
+                finished = jobs.status(job_id)['status'] == 'done'
+                rows = jobs.results(job_id, sent)
+                for row in rows:
+                    yield json.dumps(row, default=float) + '\n'
+                sent += len(rows)
+                if finished or not follow:
+                    return
+                time.sleep(0.5)
+
+        return Response(stream(), mimetype='application/x-ndjson')
+
     return app
 
+def score_csv_cli(argv):
+    """python fraud_detector.py score-csv INPUT OUTPUT [--chunk-size N] [--processes N]"""
+    parser = argparse.ArgumentParser(prog="fraud_detector.py score-csv",
+                                     description="Score a pharma_amm_data.csv-shaped file in chunks")
+    parser.add_argument('input', help="CSV of AMM records")
+    parser.add_argument('output', help="CSV written with amm_number, predicted, probability (and actual), error")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Rows read and scored per model call")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes scoring chunks in parallel")
+    parser.add_argument('--model', default='amm.joblib', help="Model file or compiled forest directory")
+    args = parser.parse_args(argv)
+
+    try:
+        stats = score_csv(args.input, args.output, args.chunk_size, args.processes, args.model)
+    except Exception as e:
+        print(f"\n❌ Bulk scoring failed: {str(e)}")
+        sys.exit(1)
+    print(f"\n✅ Scored {stats['rows']} rows in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_second']:,.0f} rows/s) -> {args.output}")
+    if stats['errors']:
+        print(f"⚠️ {stats['errors']} rows could not be scored; see the error column of {args.output}")
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ['score-csv']:
+        score_csv_cli(sys.argv[2:])
+        sys.exit(0)
+
     # When run directly, support both CLI and Flask modes
-    if len(sys.argv) == 2 and sys.argv[1] == '--flask':
-        app = create_flask_app()
-        # Create upload folder if it doesn't exist
-        if not os.path.exists(app.config['UPLOAD_FOLDER']):
-            os.makedirs(app.config['UPLOAD_FOLDER'])
+    parser = argparse.ArgumentParser(description="Pharmaceutical AMM fraud detection")
+    parser.add_argument('pdf_path', nargs='?', help="AMM PDF to validate")
+    parser.add_argument('--model', default=DEFAULT_MODEL,
+                        help="Compiled forest directory, model file or train.py bundle")
+    parser.add_argument('--flask', action='store_true', help="Run the Flask API")
+    parser.add_argument('--prefork', type=int, default=0, metavar='N',
+                        help="Run the Flask API on N forked workers sharing one model, "
+                             "hot-swapping it when --model changes")
+    parser.add_argument('--watch-interval', type=float, default=2.0,
+                        help="Seconds between checks of --model for a new version (prefork mode)")
+    parser.add_argument('--async', dest='async_server', action='store_true',
+                        help="Run the asyncio API, batching concurrent predictions (requires aiohttp)")
+    parser.add_argument('--max-batch-size', type=int, default=32,
+                        help="Most predictions scored in one model call (async mode)")
+    parser.add_argument('--max-wait-ms', type=float, default=5.0,
+                        help="Longest a prediction waits for its batch to fill (async mode)")
+    parser.add_argument('--records', help="AMM registry database built with record_store.py "
+                                          "(dossier attributes are synthesized without it)")
+    parser.add_argument('--index', help="AMM/lot number index built with amm_index.py; documents with "
+                                        "unregistered or reused identifiers are rejected before scoring")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Worker processes for PDF parsing (Flask/async mode, 0 = in-process)")
+    parser.add_argument('--max-pages', type=int, default=MAX_PDF_PAGES,
+                        help="Pages read per PDF before giving up on missing fields")
+    parser.add_argument('--max-chars', type=int, default=MAX_PDF_CHARS,
+                        help="Characters of text a PDF may yield before it is rejected")
+    parser.add_argument('--task-timeout', type=float, default=30.0,
+                        help="Seconds a worker may spend on one PDF before it is recycled")
+    parser.add_argument('--max-queue', type=int, default=32,
+                        help="PDFs allowed to wait for a worker before returning 503")
+    parser.add_argument('--cache-size', type=int, default=1024,
+                        help="Validation results kept in memory, keyed by PDF SHA-256 (0 = off)")
+    parser.add_argument('--cache-db', help="SQLite file persisting cached results across restarts")
+    parser.add_argument('--cache-ttl', type=float, default=7 * 24 * 3600,
+                        help="Seconds a cached result stays valid")
+    parser.add_argument('--profile-slowest', type=int, default=0,
+                        help="Keep cProfile dumps of the N slowest validation requests (Flask mode, 0 = off)")
+    parser.add_argument('--profile-dir', default='profiles', help="Directory for --profile-slowest dumps")
+    parser.add_argument('--jobs-db', help="SQLite queue enabling POST /jobs for background archive validation "
+                                          "(Flask mode)")
+    parser.add_argument('--job-workers', type=int, default=2,
+                        help="Worker processes dedicated to background jobs (0 = one in-process thread)")
+    args = parser.parse_args()
+
+    if args.prefork:
+        from prefork_server import PreforkServer
+
+        def build_app(loaded_model):
+            # Runs in each worker after the fork; the workers themselves are the parallelism
+            return create_flask_app(0, args.task_timeout, args.max_queue, args.cache_size, args.cache_db,
+                                    args.cache_ttl, args.records, args.profile_slowest, args.profile_dir,
+                                    args.model, loaded_model, args.index,
+                                    max_pages=args.max_pages, max_chars=args.max_chars)
+
+        PreforkServer(build_app, args.model, port=5000, workers=args.prefork,
+                      watch_interval=args.watch_interval, drain_timeout=args.task_timeout).serve_forever()
+    elif args.flask:
+        app = create_flask_app(args.workers, args.task_timeout, args.max_queue,
+                               args.cache_size, args.cache_db, args.cache_ttl, args.records,
+                               args.profile_slowest, args.profile_dir, args.model, index_path=args.index,
+                               jobs_db=args.jobs_db, job_workers=args.job_workers,
+                               max_pages=args.max_pages, max_chars=args.max_chars)
         print("\n🔌 Starting Flask server...")
         print("   POST PDFs to /validate_amm to validate AMM documents")
-        app.run(debug=True, host='0.0.0.0', port=5000)
-    elif len(sys.argv) == 2:
+        print("   POST several PDFs as 'files' to /validate_amm_batch for batch validation")
+        print("   GET /metrics for Prometheus stage latencies and outcome counters")
+        if args.jobs_db:
+            print("   POST an archive (or 'files') to /jobs, then GET /jobs/<id> and /jobs/<id>/results (NDJSON)")
+        if args.workers:
+            print(f"   Parsing PDFs on {args.workers} worker processes")
+        # The reloader would start a second copy of the worker pools and job runner
+        app.run(debug=True, host='0.0.0.0', port=5000, threaded=True, use_reloader=not (args.workers or args.jobs_db))
+    elif args.async_server:
+        from aiohttp import web
+        from async_server import create_async_app
+        from pdf_workers import PDFWorkerPool
+
+        cache = ResultCache(args.cache_size, args.cache_db, args.cache_ttl) if args.cache_size else None
+        detector = PharmaFraudDetector(args.model, args.max_pages, args.max_chars, cache=cache,
+                                       record_store=args.records, identifier_index=args.index)
+        pool = None
+        if args.workers:
+            pool = PDFWorkerPool(args.workers, args.model, task_timeout=args.task_timeout, max_queue=args.max_queue,
+                                 records_path=args.records, index_path=args.index, max_pages=args.max_pages,
+                                 max_chars=args.max_chars)
+        app = create_async_app(detector, pool, args.max_batch_size, args.max_wait_ms)
+        print("\n🔌 Starting async server...")
+        print("   POST PDFs to /validate_amm to validate AMM documents")
+        print(f"   Batching up to {args.max_batch_size} predictions, waiting at most {args.max_wait_ms} ms")
+        web.run_app(app, host='0.0.0.0', port=5000)
+    elif args.pdf_path:
         # Original CLI functionality
-        main(sys.argv[1])
+        main(args.pdf_path, args.records, args.model, args.max_pages, args.max_chars)
     else:
         print("Usage:")
         print("  For PDF validation: python fraud_detector.py <PDF_PATH>")
-        print("  For Flask API: python fraud_detector.py --flask")
-        sys.exit(1)
\ No newline at end of file
+        print("  For Flask API: python fraud_detector.py --flask [--workers N]")
+        print("  For production API with model hot-swap: python fraud_detector.py --prefork N [--model PATH]")
+        print("  For async API: python fraud_detector.py --async [--max-batch-size N] [--max-wait-ms MS]")
+        print("  For bulk CSV scoring: python fraud_detector.py score-csv <INPUT_CSV> <OUTPUT_CSV> [--processes N]")
+        sys.exit(1)
@@ -0,0 +1,229 @@
+# job_queue.py
+# Durable background validation of many PDFs: jobs and their documents live in
+# SQLite and on disk, so a restart resumes where it stopped
+import json
+import os
+import shutil
+import sqlite3
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+
+from metrics import record_outcome
+
+# Largest single PDF accepted from an archive, same as a /validate_amm upload
+MAX_MEMBER_SIZE = 32 * 1024 * 1024
+
+
+def read_archive(stream, max_files, max_member_size=MAX_MEMBER_SIZE):
+    """Yield (filename, bytes) of every PDF in a zip or tar archive stream"""
+    count = 0
+
+    def accept(name, size):
+        nonlocal count
+        if not name.lower().endswith('.pdf') or os.path.basename(name).startswith('._'):
+            return False
+        if size > max_member_size:
+            raise ValueError(f"{name} exceeds the {max_member_size} byte limit")
+        count += 1
+        if count > max_files:
+            raise ValueError(f"Archive holds more than {max_files} PDFs")
+        return True
+
+    if zipfile.is_zipfile(stream):
+        stream.seek(0)
+        with zipfile.ZipFile(stream) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and accept(info.filename, info.file_size):
+                    yield os.path.basename(info.filename), archive.read(info)
+        return
+
+    stream.seek(0)
+    try:
+        archive = tarfile.open(fileobj=stream, mode='r:*')
+    except tarfile.TarError:
+        raise ValueError("Archive is neither zip nor tar")
+    with archive:
+        for member in archive:
+            if member.isfile() and accept(member.name, member.size):
+                yield os.path.basename(member.name), archive.extractfile(member).read()
+
+
+class JobStore:
+    def __init__(self, db_path='amm_jobs.db', files_dir=None):
+        """SQLite queue of validation jobs; submitted PDFs wait in files_dir until processed"""
+        self.db_path = db_path
+        self.files_dir = files_dir or db_path + '.files'
+        os.makedirs(self.files_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, created REAL NOT NULL, finished REAL, total INTEGER NOT NULL, "
+            "done INTEGER NOT NULL DEFAULT 0, frauds INTEGER NOT NULL DEFAULT 0, errors INTEGER NOT NULL DEFAULT 0)"
+        )
+        # The integer key orders documents first in, first out across jobs
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "id INTEGER PRIMARY KEY, job_id TEXT NOT NULL, seq INTEGER NOT NULL, filename TEXT NOT NULL, "
+            "state TEXT NOT NULL, done_order INTEGER, result TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_state ON items (state, id)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_done ON items (job_id, done_order)")
+        # Documents claimed by a process that stopped go back to the queue
+        self._db.execute("UPDATE items SET state = 'pending' WHERE state = 'running'")
+        self._db.commit()
+
+    def submit(self, files):
+        """Queue (filename, pdf_bytes) pairs as one job; returns the job ID"""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.files_dir, job_id)
+        os.makedirs(job_dir)
+
+        rows = []
+        try:
+            for seq, (filename, pdf_bytes) in enumerate(files):
+                with open(os.path.join(job_dir, f'{seq:06d}.pdf'), 'wb') as f:
+                    f.write(pdf_bytes)
+                rows.append((job_id, seq, filename, 'pending'))
+            if not rows:
+                raise ValueError("No PDF files submitted")
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        # Rows become visible to workers only once every file is on disk
+        with self._lock:
+            self._db.execute("INSERT INTO jobs (id, created, total) VALUES (?, ?, ?)",
+                             (job_id, time.time(), len(rows)))
+            self._db.executemany("INSERT INTO items (job_id, seq, filename, state) VALUES (?, ?, ?, ?)", rows)
+            self._db.commit()
+        return job_id
+
+    def claim(self):
+        """Mark the oldest pending document as running; returns (item_id, job_id, filename, path) or None"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, job_id, seq, filename FROM items WHERE state = 'pending' ORDER BY id LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE items SET state = 'running' WHERE id = ?", (row[0],))
+            self._db.commit()
+        item_id, job_id, seq, filename = row
+        return item_id, job_id, filename, os.path.join(self.files_dir, job_id, f'{seq:06d}.pdf')
+
+    def complete(self, item_id, job_id, result):
+        """Store a document's result and advance its job's progress; returns True when the job is done"""
+        error = 'error' in result
+        fraud = result.get('status') == 'FRAUD'
+        with self._lock:
+            done, total = self._db.execute("SELECT done, total FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            self._db.execute("UPDATE items SET state = 'done', done_order = ?, result = ? WHERE id = ?",
+                             (done, json.dumps(result, default=float), item_id))
+            self._db.execute(
+                "UPDATE jobs SET done = done + 1, frauds = frauds + ?, errors = errors + ?, "
+                "finished = CASE WHEN done + 1 = total THEN ? END WHERE id = ?",
+                (int(fraud), int(error), time.time(), job_id)
+            )
+            self._db.commit()
+        return done + 1 == total
+
+    def status(self, job_id):
+        """Progress of a job as a dict, or None for an unknown ID"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT created, finished, total, done, frauds, errors FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        created, finished, total, done, frauds, errors = row
+        return {
+            'job_id': job_id,
+            'status': 'done' if finished is not None else ('running' if done else 'queued'),
+            'total': total,
+            'done': done,
+            'frauds': frauds,
+            'errors': errors,
+            'progress': done / total,
+            'created': created,
+            'finished': finished
+        }
+
+    def results(self, job_id, after=0):
+        """Results finished since the first `after` ones, in completion order"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT seq, filename, result FROM items WHERE job_id = ? AND done_order >= ? ORDER BY done_order",
+                (job_id, after)
+            ).fetchall()
+        return [{'seq': seq, 'filename': filename, **json.loads(result)} for seq, filename, result in rows]
+
+    def pending(self):
+        """Documents waiting or running across all jobs"""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM items WHERE state != 'done'").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class JobRunner:
+    def __init__(self, store, detector, extract=None, parallelism=2, poll_interval=1.0):
+        """Validate queued documents on parallelism background threads"""
+        self.store = store
+        self.detector = detector
+        self.extract = extract  # Optional callable(stream) -> extracted data, e.g. on a worker pool
+        self.parallelism = parallelism
+        self.poll_interval = poll_interval
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.parallelism):
+            thread = threading.Thread(target=self._run, name=f'job-runner-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def notify(self):
+        """Wake idle runners after a submit"""
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        """Finish the documents in progress and stop; the rest stay queued"""
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            item = self.store.claim()
+            if item is None:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+                continue
+
+            try:
+                self._process(*item)
+            except Exception as e:
+                # Never let one document kill the runner; the item is retried after a restart
+                print(f"⚠️ Job runner error: {str(e)}")
+
+    def _process(self, item_id, job_id, filename, path):
+        try:
+            with open(path, 'rb') as f:
+                result = self.detector.validate_pdf(f, self.extract)
+        except Exception as e:
+            result = {'error': str(e)}
+        record_outcome(result)
+        # Delete before completing: once the last item is done, the job directory must be empty
+        if os.path.exists(path):
+            os.remove(path)
+        if self.store.complete(item_id, job_id, result):
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
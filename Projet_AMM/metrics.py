@@ -0,0 +1,192 @@
+# metrics.py
+# Minimal Prometheus text-format metrics, so the service needs no extra dependency
+import bisect
+import cProfile
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from sub-millisecond parsing to slow uploads
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Histogram:
+    def __init__(self, name, help_text, label, buckets=DEFAULT_BUCKETS):
+        """Cumulative-bucket latency histogram with one label dimension"""
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value, seconds):
+        with self._lock:
+            series = self._series.get(label_value)
+            if series is None:
+                # Per-bucket counts (non-cumulative, +Inf last), sum, count
+                series = self._series[label_value] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, seconds)] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_value, (counts, total, count) in sorted(self._series.items()):
+                for bound, cumulative in zip(self.buckets + (float('inf'),), itertools.accumulate(counts)):
+                    lines.append(
+                        f'{self.name}_bucket{{{self.label}="{label_value}",le="{_format_value(bound)}"}} {cumulative}'
+                    )
+                lines.append(f'{self.name}_sum{{{self.label}="{label_value}"}} {_format_value(total)}')
+                lines.append(f'{self.name}_count{{{self.label}="{label_value}"}} {count}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, help_text, label):
+        """Monotonic counter with one label dimension"""
+        self.name = name
+        self.help_text = help_text
+        self.label = label
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value, amount=1):
+        with self._lock:
+            self._values[label_value] = self._values.get(label_value, 0) + amount
+
+    def value(self, label_value):
+        return self._values.get(label_value, 0)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_value, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {value}')
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, help_text):
+        """Single value that can go up and down"""
+        self.name = name
+        self.help_text = help_text
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge"]
+        if self.value is not None:
+            lines.append(f"{self.name} {_format_value(self.value)}")
+        return lines
+
+
+STAGE_SECONDS = Histogram('amm_stage_seconds', "Time spent in each validation stage", 'stage')
+REQUESTS = Counter('amm_requests_total', "Validated documents by outcome", 'outcome')
+MODEL_LOAD_SECONDS = Gauge('amm_model_load_seconds', "Time taken by the last model load")
+
+_capture = threading.local()
+
+
+def observe_stage(stage, seconds):
+    """Record one stage timing, also handing it to an active capture_stages block"""
+    STAGE_SECONDS.observe(stage, seconds)
+    captured = getattr(_capture, 'timings', None)
+    if captured is not None:
+        captured.append((stage, seconds))
+
+
+@contextmanager
+def time_stage(stage):
+    """Observe the wall time spent in the with block under stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def capture_stages():
+    """Collect the stage timings recorded by this thread, e.g. to ship them from a worker"""
+    previous = getattr(_capture, 'timings', None)
+    _capture.timings = timings = []
+    try:
+        yield timings
+    finally:
+        _capture.timings = previous
+
+
+def record_outcome(result):
+    """Count a validation result (or exception) as VALID, FRAUD or error"""
+    if isinstance(result, Exception) or 'error' in result:
+        REQUESTS.inc('error')
+    else:
+        REQUESTS.inc(result['status'])
+
+
+def render_metrics():
+    """All service metrics in Prometheus text exposition format"""
+    lines = []
+    for metric in (STAGE_SECONDS, REQUESTS, MODEL_LOAD_SECONDS):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class SlowRequestProfiler:
+    def __init__(self, top_n, out_dir, sample_rate=1.0):
+        """Profile sampled requests and keep cProfile dumps of the slowest top_n"""
+        self.top_n = top_n
+        self.out_dir = out_dir
+        self.sample_rate = sample_rate
+        os.makedirs(out_dir, exist_ok=True)
+        self._slowest = []  # min-heap of (seconds, path)
+        self._counter = itertools.count()
+        # One request at a time: bounds the overhead, and Python 3.12+ allows only one active profiler
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+
+    def run(self, name, func, *args, **kwargs):
+        """Call func, profiling it when sampled and the profiler is free"""
+        if random.random() >= self.sample_rate or not self._active.acquire(blocking=False):
+            return func(*args, **kwargs)
+
+        try:
+            profile = cProfile.Profile()
+            start = time.perf_counter()
+            profile.enable()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profile.disable()
+                self._keep(name, time.perf_counter() - start, profile)
+        finally:
+            self._active.release()
+
+    def _keep(self, name, seconds, profile):
+        """Dump the profile if it is among the slowest seen, dropping the one it displaces"""
+        with self._lock:
+            if len(self._slowest) >= self.top_n and seconds <= self._slowest[0][0]:
+                return
+            path = os.path.join(self.out_dir, f"{name}-{seconds * 1000:.1f}ms-{next(self._counter)}.prof")
+            profile.dump_stats(path)
+            heapq.heappush(self._slowest, (seconds, path))
+            if len(self._slowest) > self.top_n:
+                _, evicted = heapq.heappop(self._slowest)
+                os.remove(evicted)
+
+    def slowest(self):
+        """(seconds, path) of the kept profiles, slowest first"""
+        with self._lock:
+            return sorted(self._slowest, reverse=True)
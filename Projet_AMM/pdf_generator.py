@@ -1,36 +1,88 @@
+import io
 import os
 from fpdf import FPDF
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+import argparse
+import copy
+import csv
 import random
 import hashlib
+import time
 import qrcode
-import io
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from document_add import MANUFACTURERS, amm_number_width, generate_amm_columns
+
+# Label/value rows of the attestation, in page order
+FIELD_LABELS = [
+    'Numéro AMM', 'Médicament', 'Substance Active', 'Forme Pharmaceutique', 'Date Fabrication',
+    'Date Péremption', 'Fabricant', "Pays d'Origine", 'Numéro de Lot', 'Conditions de Conservation'
+]
+
+# (medicament, substance, forme) of genuine products
+VALID_PRODUCTS = [
+    ('DOLIPRANE 500mg', 'paracétamol', 'comprimé'),
+    ('AMOXICILLINE 500mg', 'amoxicilline', 'gélule'),
+    ('IBUPROFENE 400mg', 'ibuprofène', 'comprimé pelliculé'),
+    ('AMLODIPINE 5mg', 'amlodipine', 'comprimé'),
+    ('OMEPRAZOLE 20mg', 'oméprazole', 'gélule gastro-résistante')
+]
+
+# Corpus manifest: registry columns first, so record_store.py can import it as-is
+MANIFEST_COLUMNS = [
+    'amm_number', 'product_name', 'manufacturer', 'submission_date', 'approval_date',
+    'clinical_trial_participants', 'reported_side_effects', 'batch_size', 'price_per_unit',
+    'production_cost', 'lot_number', 'expected_label', 'pages', 'filename', 'sha256'
+]
+
+# Fixed dates keep corpus output byte-identical for a given seed
+CORPUS_DATE = date(2024, 1, 1)
+CORPUS_CREATION_DATE = datetime(2024, 1, 1)
+# Corpus QR codes use one mask: qrcode's scoring of all eight masks is its main cost
+CORPUS_QR_MASK = 0
+# Shortest corpus AMM number padding; larger corpora widen it so numbers stay fixed-width
+CORPUS_NUMBER_WIDTH = 6
 
 class PDFGenerator:
-    def __init__(self):
+    def __init__(self, output_dir="pdf_output"):
         self.font_path = None  # Set to your font file if needed
         self.logo_path = None  # Set to 'logo.png' if you have one
         
         # Create output directory if it doesn't exist
-        os.makedirs("pdf_output", exist_ok=True)
+        os.makedirs(output_dir, exist_ok=True)
 
     def generate_hash(self, data):
         """Generate SHA-256 hash of document content"""
         return hashlib.sha256(data.encode()).hexdigest()
 
-    def add_qr_code(self, pdf, data, x, y, size=30):
-        """Add QR code with verification data"""
+    def add_qr_code(self, pdf, data, x, y, size=30, mask_pattern=None):
+        """Add QR code with verification data
+
+        A fixed mask_pattern (corpus documents) also draws the module matrix
+        directly; None keeps qrcode's best-mask search and PNG rendering.
+        """
         try:
-            qr = qrcode.QRCode(version=1, box_size=2, border=2)
+            qr = qrcode.QRCode(version=1, box_size=2, border=2, mask_pattern=mask_pattern)
             qr.add_data(data)
             qr.make(fit=True)
-            img = qr.make_image(fill_color="black", back_color="white")
-            
-            img_bytes = io.BytesIO()
-            img.save(img_bytes, format='PNG')
-            img_bytes.seek(0)
-            
-            pdf.image(img_bytes, x=x, y=y, w=size)
+
+            if mask_pattern is None:
+                img = qr.make_image(fill_color="black", back_color="white")
+
+                img_bytes = io.BytesIO()
+                img.save(img_bytes, format='PNG')
+                img_bytes.seek(0)
+
+                pdf.image(img_bytes, x=x, y=y, w=size)
+            else:
+                # Module matrix straight to a grayscale image, without a PNG encode/decode
+                modules = np.array(qr.get_matrix(), dtype=bool)
+                img = Image.fromarray(np.where(modules, 0, 255).astype(np.uint8), 'L')
+
+                pdf.image(img, x=x, y=y, w=size)
         except Exception as e:
             print(f"QR code generation failed: {e}")
 
@@ -103,8 +155,198 @@ class PDFGenerator:
             print(f"Error generating PDF: {e}")
             return None
 
+    def _template(self):
+        """Blank attestation page with the header laid out, built once and copied per document"""
+        if getattr(self, '_template_pdf', None) is None:
+            pdf = FPDF()
+            pdf.set_creation_date(CORPUS_CREATION_DATE)
+            pdf.add_page()
+            pdf.set_auto_page_break(auto=True, margin=15)
+
+            # Header
+            pdf.set_font("helvetica", 'B', 16)
+            pdf.cell(0, 10, 'ATTESTATION DE MISE SUR LE MARCHÉ', 0, 1, 'C')
+            pdf.ln(10)
+            pdf.set_font("helvetica", size=12)
+            self._template_pdf = pdf
+        return self._template_pdf
+
+    def corpus_document(self, index, seed, fraud_rate=0.5, width=CORPUS_NUMBER_WIDTH):
+        """Deterministic field values, dossier and label of corpus document index
+
+        width is the zero-padding of the AMM number (see corpus_number_width).
+        """
+        rng = random.Random(f"{seed}:{index}")
+        is_fraud = rng.random() < fraud_rate
+        fab_date = CORPUS_DATE - timedelta(days=rng.randint(30, 365))
+
+        if is_fraud:
+            # Same red flags as create_amm_pdf: overdosed product, short shelf life, short lot number
+            medicament, substance, forme = 'PARACETAMOL ZENITH 1000mg', 'paracétamol', 'comprimé pelliculé'
+            fabricant = 'LABORATOIRES ZENITH'
+            exp_date = fab_date + timedelta(days=rng.randint(366, 400))
+            lot = 'LOT' + str(rng.randint(100, 999))
+        else:
+            medicament, substance, forme = rng.choice(VALID_PRODUCTS)
+            fabricant = rng.choice(MANUFACTURERS)
+            exp_date = fab_date + timedelta(days=rng.randint(730, 1460))
+            lot = f"LOT{fab_date:%y%m}-{index:0{width + 1}d}"
+
+        # Registry dossier drawn from document_add.py's fraud / non-fraud distributions
+        dossier = generate_amm_columns(index + 1, 1, np.random.default_rng([seed, index]), [is_fraud])
+
+        return {
+            'num_amm': f"AMM-2023-{index + 1:0{width}d}",
+            'medicament': medicament,
+            'substance': substance,
+            'forme': forme,
+            'fab_date': fab_date.strftime('%Y-%m-%d'),
+            'exp_date': exp_date.strftime('%Y-%m-%d'),
+            'fabricant': fabricant,
+            'pays': 'France',
+            'lot': lot,
+            'cond_temp': '2-8°C',
+            'cond_hum': 'max 60%',
+            'label': 'FRAUD' if is_fraud else 'VALID',
+            'dossier': {
+                'submission_date': str(dossier['submission_date'][0]),
+                'approval_date': str(dossier['approval_date'][0]),
+                'clinical_trial_participants': int(dossier['clinical_trial_participants'][0]),
+                'reported_side_effects': int(dossier['reported_side_effects'][0]),
+                'batch_size': int(dossier['batch_size'][0]),
+                'price_per_unit': float(dossier['price_per_unit'][0]),
+                'production_cost': float(dossier['production_cost'][0])
+            }
+        }
+
+    def render_amm_pdf(self, data, extra_pages=0):
+        """PDF bytes of an attestation, drawn onto a copy of the cached template"""
+        doc_content = f"{data['num_amm']}{data['medicament']}{data['fab_date']}{data['exp_date']}"
+        hash_securite = self.generate_hash(doc_content)[:32]
+
+        pdf = copy.deepcopy(self._template())
+        values = [
+            data['num_amm'], data['medicament'], data['substance'], data['forme'], data['fab_date'],
+            data['exp_date'], data['fabricant'], data['pays'], data['lot'],
+            f"{data['cond_temp']}, {data['cond_hum']}"
+        ]
+
+        # text() at fixed baselines skips cell() layout; label then value keeps each
+        # pair on one line in the content stream, as text extraction expects
+        y = pdf.get_y() + 5.5
+        for label, value in zip(FIELD_LABELS, values):
+            pdf.set_font("helvetica", size=12)
+            pdf.text(pdf.l_margin + 1, y, label + ':')
+            pdf.set_font("helvetica", 'B', 12)
+            pdf.text(pdf.l_margin + 61, y, value)
+            y += 11
+
+        # Security features
+        self.add_qr_code(pdf, f"AMM:{data['num_amm']}|HASH:{hash_securite}", x=160, y=y - 5.5,
+                         mask_pattern=CORPUS_QR_MASK)
+
+        # Oversized documents for stress tests: annex pages after the attestation
+        pdf.set_font("helvetica", size=10)
+        for page in range(extra_pages):
+            pdf.add_page()
+            for line in range(50):
+                pdf.text(pdf.l_margin, 20 + line * 5,
+                         f"Annexe {page + 1}, ligne {line + 1}: données de pharmacovigilance {data['num_amm']}")
+
+        return bytes(pdf.output())
+
+    def generate_corpus_range(self, out_dir, start, stop, seed, fraud_rate=0.5, extra_pages=0,
+                              width=CORPUS_NUMBER_WIDTH):
+        """Write corpus documents start .. stop - 1 and return their manifest rows"""
+        rows = []
+        for index in range(start, stop):
+            data = self.corpus_document(index, seed, fraud_rate, width)
+            pdf_bytes = self.render_amm_pdf(data, extra_pages)
+            filename = f"{data['num_amm']}_{data['label']}.pdf"
+            with open(os.path.join(out_dir, filename), 'wb') as f:
+                f.write(pdf_bytes)
+
+            rows.append({
+                'amm_number': data['num_amm'],
+                'product_name': data['medicament'],
+                'manufacturer': data['fabricant'],
+                **data['dossier'],
+                'lot_number': data['lot'],
+                'expected_label': data['label'],
+                'pages': 1 + extra_pages,
+                'filename': filename,
+                'sha256': hashlib.sha256(pdf_bytes).hexdigest()
+            })
+        return rows
+
+
+# Generator of a corpus worker process, so each worker builds its template once
+_CORPUS_GENERATOR = None
+
+def corpus_number_width(count):
+    """AMM number padding of a corpus of count documents: fixed-width, and at least CORPUS_NUMBER_WIDTH"""
+    return max(CORPUS_NUMBER_WIDTH, amm_number_width(count))
+
+def _generate_corpus_batch(out_dir, start, stop, seed, fraud_rate, extra_pages, width):
+    global _CORPUS_GENERATOR
+    if _CORPUS_GENERATOR is None:
+        _CORPUS_GENERATOR = PDFGenerator(out_dir)
+    return _CORPUS_GENERATOR.generate_corpus_range(out_dir, start, stop, seed, fraud_rate, extra_pages, width)
+
+def generate_corpus(count, out_dir="pdf_corpus", seed=42, fraud_rate=0.5, processes=1, extra_pages=0,
+                    batch_size=500):
+    """Generate count AMM PDFs plus manifest.csv (hash and expected label per file)"""
+    os.makedirs(out_dir, exist_ok=True)
+    width = corpus_number_width(count)
+    tasks = [
+        (out_dir, start, min(start + batch_size, count), seed, fraud_rate, extra_pages, width)
+        for start in range(0, count, batch_size)
+    ]
+
+    frauds = 0
+    with open(os.path.join(out_dir, 'manifest.csv'), 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_COLUMNS)
+        writer.writeheader()
+
+        # Batches come back in order, so the manifest does not depend on processes
+        if processes > 1:
+            executor = ProcessPoolExecutor(processes)
+            batches = executor.map(_generate_corpus_batch, *zip(*tasks))
+        else:
+            executor = None
+            batches = (_generate_corpus_batch(*task) for task in tasks)
+
+        try:
+            for rows in batches:
+                writer.writerows(rows)
+                frauds += sum(row['expected_label'] == 'FRAUD' for row in rows)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    return frauds
+
 if __name__ == "__main__":
-    generator = PDFGenerator()
-    print("Generating fraudulent PDF...")
-    fraud_pdf = generator.create_amm_pdf(is_valid=False)
-    print("Done! Check the 'pdf_output' folder.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate AMM attestation PDFs")
+    parser.add_argument('--count', type=int, help="Generate a corpus of this many PDFs instead of one sample")
+    parser.add_argument('--out-dir', default="pdf_corpus", help="Corpus directory (PDFs and manifest.csv)")
+    parser.add_argument('--seed', type=int, default=42, help="Same seed, same bytes")
+    parser.add_argument('--fraud-rate', type=float, default=0.5, help="Share of FRAUD documents")
+    parser.add_argument('--processes', type=int, default=1, help="Worker processes rendering PDFs")
+    parser.add_argument('--extra-pages', type=int, default=0,
+                        help="Annex pages appended to each document, for oversized stress-test inputs")
+    args = parser.parse_args()
+
+    if args.count:
+        start = time.perf_counter()
+        frauds = generate_corpus(args.count, args.out_dir, args.seed, args.fraud_rate, args.processes,
+                                 args.extra_pages)
+        elapsed = time.perf_counter() - start
+        print(f"Generated {args.count} PDFs ({frauds} FRAUD) in {args.out_dir} "
+              f"in {elapsed:.1f}s ({args.count / elapsed:,.0f} PDFs/s)")
+        print(f"Manifest: {os.path.join(args.out_dir, 'manifest.csv')}")
+    else:
+        generator = PDFGenerator()
+        print("Generating fraudulent PDF...")
+        fraud_pdf = generator.create_amm_pdf(is_valid=False)
+        print("Done! Check the 'pdf_output' folder.")
\ No newline at end of file
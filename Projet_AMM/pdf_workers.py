@@ -0,0 +1,159 @@
+# pdf_workers.py
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import observe_stage
+
+
+class PoolSaturated(Exception):
+    """Raised when the worker queue is full"""
+
+
+class WorkerCrashed(Exception):
+    """Raised when a worker process dies while handling a task"""
+
+
+def _worker_main(conn, model_path, records_path, index_path, max_pages, max_chars):
+    """Load the detector once, then serve process_pdf requests over a pipe"""
+    # Imported here so the parent only pays for it when workers are spawned
+    from fraud_detector import MAX_PDF_CHARS, MAX_PDF_PAGES, PharmaFraudDetector
+    from metrics import capture_stages
+
+    detector = PharmaFraudDetector(model_path, max_pages or MAX_PDF_PAGES, max_chars or MAX_PDF_CHARS,
+                                   record_store=records_path, identifier_index=index_path)
+    conn.send(('ready', None))
+
+    while True:
+        try:
+            pdf_bytes = conn.recv()
+        except EOFError:
+            break
+
+        # Stage timings travel back with the result so the parent's /metrics sees them
+        with capture_stages() as timings:
+            try:
+                status, payload = 'ok', detector.process_pdf(pdf_bytes)
+            except Exception as e:
+                status, payload = 'error', str(e)
+        conn.send((status, payload, timings))
+
+
+class _Worker:
+    def __init__(self, context, model_path, records_path, index_path, max_pages, max_chars):
+        """Start one worker process connected by a pipe"""
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, model_path, records_path, index_path, max_pages, max_chars),
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+
+    def wait_ready(self, timeout):
+        """Block until the worker has loaded its model"""
+        if not self.ready:
+            if not self.conn.poll(timeout):
+                raise WorkerCrashed(f"Worker did not start within {timeout}s")
+            self.conn.recv()
+            self.ready = True
+
+    def kill(self):
+        """Terminate the process and release the pipe"""
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class PDFWorkerPool:
+    def __init__(self, size, model_path='amm_forest', task_timeout=30.0, max_queue=32, startup_timeout=120.0,
+                 records_path=None, index_path=None, max_pages=None, max_chars=None):
+        """Start size worker processes that each load the detector once
+
+        max_pages and max_chars are the workers' text extraction budget; None keeps
+        the detector's defaults.
+        """
+        self.size = size
+        self.model_path = model_path
+        self.records_path = records_path
+        self.index_path = index_path
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+        self.task_timeout = task_timeout
+        self.startup_timeout = startup_timeout
+        # spawn, not fork: the Flask server is multi-threaded when the pool is used
+        self._context = multiprocessing.get_context('spawn')
+
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(self._start_worker())
+
+        # Tasks running plus tasks waiting for a worker
+        self._slots = threading.BoundedSemaphore(size + max_queue)
+        self._dispatch = ThreadPoolExecutor(max_workers=size)
+
+    def process_pdf(self, pdf_bytes):
+        """Run detector.process_pdf on a worker and return its result"""
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated("All PDF workers are busy, try again later")
+
+        try:
+            worker = self._idle.get()
+            try:
+                if not worker.process.is_alive():
+                    worker = self._replace(worker)
+                worker.wait_ready(self.startup_timeout)
+                worker.conn.send(bytes(pdf_bytes))
+
+                finished = worker.conn.poll(self.task_timeout)
+                if finished:
+                    status, payload, timings = worker.conn.recv()
+                    for stage, seconds in timings:
+                        observe_stage(stage, seconds)
+            except (EOFError, OSError, WorkerCrashed) as e:
+                worker = self._replace(worker)
+                raise WorkerCrashed(f"PDF worker crashed: {str(e) or type(e).__name__}")
+            else:
+                if not finished:
+                    # The worker may be stuck in pure-Python parsing; only a kill frees it
+                    worker = self._replace(worker)
+            finally:
+                self._idle.put(worker)
+        finally:
+            self._slots.release()
+
+        if not finished:
+            raise TimeoutError(f"PDF processing exceeded {self.task_timeout}s")
+        if status == 'error':
+            raise ValueError(payload)
+        return payload
+
+    def process_many(self, pdf_blobs):
+        """Process several PDFs concurrently; each entry is a result or an exception"""
+        def run(pdf_bytes):
+            try:
+                return self.process_pdf(pdf_bytes)
+            except Exception as e:
+                return e
+
+        return list(self._dispatch.map(run, pdf_blobs))
+
+    def _replace(self, worker):
+        """Kill a stuck or dead worker and start a fresh one in its place"""
+        worker.kill()
+        return self._start_worker()
+
+    def _start_worker(self):
+        return _Worker(self._context, self.model_path, self.records_path, self.index_path,
+                       self.max_pages, self.max_chars)
+
+    def close(self):
+        """Stop all workers"""
+        self._dispatch.shutdown(wait=False)
+        while True:
+            try:
+                self._idle.get_nowait().kill()
+            except queue.Empty:
+                break
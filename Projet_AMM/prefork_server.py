@@ -0,0 +1,224 @@
+# prefork_server.py
+# Production serving: the model is loaded once in the parent and shared copy-on-write
+# with forked workers; a new model file is swapped in by starting a new generation
+# of workers and draining the old one, so no request is dropped
+import gc
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+
+class PreforkServer:
+    def __init__(self, build_app, model_path='amm_forest', host='0.0.0.0', port=5000, workers=2,
+                 watch_interval=2.0, drain_timeout=30.0, startup_timeout=60.0):
+        """Serve build_app(loaded_model) on forked workers sharing one listening socket"""
+        self.build_app = build_app
+        self.model_path = model_path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.watch_interval = watch_interval
+        self.drain_timeout = drain_timeout
+        self.startup_timeout = startup_timeout
+
+        self.loaded = None  # (model, version, schema) served by the current generation
+        self.generation = {}  # pid -> model version, current generation only
+        self.draining = {}  # pid -> deadline, older generations finishing their requests
+        self.socket = None
+        self._stat = None  # Model file state being served
+        self._pending = None  # Model file state seen on the last poll
+        self._rejected = None  # Model file state that failed validation
+        self._stopping = False
+        self._reload = False
+
+    def _model_stat(self):
+        """(mtime, size) of the model file or compiled forest directory, as load_model keys its cache"""
+        from result_cache import model_stat
+
+        return model_stat(self.model_path)
+
+    def validate(self):
+        """Load the model file and score the self-test record; returns load_model's tuple"""
+        from fraud_detector import PharmaFraudDetector, load_model
+
+        loaded = load_model(self.model_path)
+        health = PharmaFraudDetector(self.model_path, loaded_model=loaded).self_test()
+        if health['status'] != 'healthy':
+            raise ValueError(f"Model self-test failed: {health['error']}")
+        return loaded
+
+    def _spawn(self, loaded):
+        """Fork one worker serving loaded; returns (pid, fd readable once it accepts requests)"""
+        ready_r, ready_w = os.pipe()
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            self._worker(loaded, ready_w)
+        os.close(ready_w)
+        return pid, ready_r
+
+    def _worker(self, loaded, ready_fd):
+        """Worker process: serve requests one at a time until told to drain"""
+        code = 0
+        try:
+            from werkzeug.serving import make_server
+
+            # SIGTERM/SIGINT keep the parent's handler, which sets _stopping in this copy
+            signal.signal(signal.SIGHUP, signal.SIG_IGN)
+            parent = os.getppid()
+            server = make_server(self.host, self.port, self.build_app(loaded), fd=self.socket.fileno())
+            server.timeout = 0.5
+            os.write(ready_fd, b'1')
+            os.close(ready_fd)
+
+            # A request in progress always completes before the stop flag is checked
+            while not self._stopping and os.getppid() == parent:
+                server.handle_request()
+        except Exception as e:
+            print(f"\n❌ Worker {os.getpid()} failed: {str(e)}")
+            code = 1
+        finally:
+            sys.stdout.flush()
+            os._exit(code)
+
+    def _start_generation(self, loaded):
+        """Fork a full set of workers for loaded and drain the previous ones once all are ready"""
+        # Objects created so far are never scanned by the cyclic GC, so workers keep sharing their pages
+        gc.freeze()
+        spawned = [self._spawn(loaded) for _ in range(self.workers)]
+
+        deadline = time.monotonic() + self.startup_timeout
+        ready = True
+        for pid, fd in spawned:
+            readable, _, _ = select.select([fd], [], [], max(0.0, deadline - time.monotonic()))
+            ready = ready and bool(readable) and os.read(fd, 1) == b'1'
+            os.close(fd)
+
+        if not ready:
+            # Keep serving the previous model rather than a generation that cannot start
+            for pid, _ in spawned:
+                self._signal(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            raise RuntimeError(f"Workers for model {loaded[1]} did not start")
+
+        deadline = time.monotonic() + self.drain_timeout
+        for pid in self.generation:
+            self._signal(pid, signal.SIGTERM)
+            self.draining[pid] = deadline
+        self.generation = {pid: loaded[1] for pid, _ in spawned}
+        self.loaded = loaded
+
+    def _check_model(self):
+        """Swap in a changed model file once it is stable and passes validation"""
+        try:
+            stat = self._model_stat()
+        except OSError:
+            return  # Mid-replacement; try again next poll
+
+        if stat != self._pending:
+            # Wait for one unchanged poll so a file still being written is never loaded
+            self._pending = stat
+            return
+        if not self._reload and stat in (self._stat, self._rejected):
+            return
+        self._reload = False
+
+        previous = self.loaded[1]
+        try:
+            self._start_generation(self.validate())
+        except Exception as e:
+            self._rejected = stat
+            print(f"\n❌ Model at {self.model_path} rejected, still serving {previous}: {str(e)}")
+            return
+
+        self._stat = stat
+        print(f"\n🔄 Model {previous} replaced by {self.loaded[1]}")
+
+    def _signal(self, pid, sig):
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self):
+        """Collect exited workers, replacing unexpected exits in the current generation"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            self.draining.pop(pid, None)
+            if self.generation.pop(pid, None) is not None and not self._stopping:
+                print(f"\n⚠️ Worker {pid} exited with status {status}, restarting it")
+                new_pid, fd = self._spawn(self.loaded)
+                os.close(fd)
+                self.generation[new_pid] = self.loaded[1]
+
+        now = time.monotonic()
+        for pid, deadline in self.draining.items():
+            if now > deadline:
+                self._signal(pid, signal.SIGKILL)
+
+    def _on_signal(self, signum, frame):
+        if signum == signal.SIGHUP:
+            self._reload = True
+        else:
+            self._stopping = True
+
+    def serve_forever(self):
+        """Bind, start the first generation and watch the model path until stopped"""
+        self._stat = self._pending = self._model_stat()
+        loaded = self.validate()
+
+        self.socket = socket.create_server((self.host, self.port), backlog=128)
+        # Workers poll the shared socket; whoever loses the race for a connection just polls again
+        self.socket.setblocking(False)
+
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, self._on_signal)
+
+        try:
+            self._start_generation(loaded)
+            print(f"\n🔌 Serving model {self.loaded[1]} on {self.host}:{self.port} with {self.workers} workers")
+            print(f"   Watching {self.model_path} for a new model (SIGHUP forces a reload)")
+
+            while not self._stopping:
+                time.sleep(self.watch_interval)
+                self._reap()
+                if not self._stopping:
+                    self._check_model()
+        finally:
+            self.stop()
+
+    def stop(self):
+        """Drain every worker, killing those still busy after drain_timeout"""
+        pids = list(self.generation) + list(self.draining)
+        for pid in pids:
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.drain_timeout
+        for pid in pids:
+            while True:
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    break
+                if done:
+                    break
+                if time.monotonic() > deadline:
+                    self._signal(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                    break
+                time.sleep(0.05)
+
+        self.generation.clear()
+        self.draining.clear()
+        if self.socket is not None:
+            self.socket.close()
+            self.socket = None
@@ -0,0 +1,148 @@
+# record_store.py
+import csv
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+
+# Dossier attributes kept per AMM number, with their SQLite types
+COLUMNS = {
+    'amm_number': 'TEXT PRIMARY KEY',
+    'product_name': 'TEXT',
+    'manufacturer': 'TEXT',
+    'submission_date': 'TEXT',
+    'approval_date': 'TEXT',
+    'clinical_trial_participants': 'INTEGER',
+    'reported_side_effects': 'INTEGER',
+    'batch_size': 'INTEGER',
+    'price_per_unit': 'REAL',
+    'production_cost': 'REAL'
+}
+
+
+class AMMRecordStore:
+    def __init__(self, db_path='amm_records.db'):
+        """Registry of AMM dossiers keyed by amm_number; the database opens on first use"""
+        self.db_path = db_path
+        self._db = None
+        self._lock = threading.RLock()
+
+    @property
+    def db(self):
+        """SQLite connection, created lazily"""
+        if self._db is None:
+            with self._lock:
+                if self._db is None:
+                    db = sqlite3.connect(self.db_path, check_same_thread=False)
+                    db.execute("PRAGMA journal_mode=WAL")
+                    # WITHOUT ROWID clusters rows on amm_number, so a lookup is one B-tree descent
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS records ("
+                        + ", ".join(f"{name} {kind}" for name, kind in COLUMNS.items())
+                        + ") WITHOUT ROWID"
+                    )
+                    db.execute("CREATE TABLE IF NOT EXISTS imports (source TEXT PRIMARY KEY, byte_offset INTEGER)")
+                    db.commit()
+                    self._db = db
+        return self._db
+
+    def get(self, amm_number):
+        """Return the dossier for amm_number as a dict, or None"""
+        row = self.db.execute("SELECT * FROM records WHERE amm_number = ?", (amm_number,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(COLUMNS, row))
+
+    def append(self, records):
+        """Insert or update dossiers; only the given rows are written"""
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        with self._lock:
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO records VALUES ({placeholders})",
+                ([record[name] for name in COLUMNS] for record in records)
+            )
+            self.db.commit()
+
+    def import_csv(self, csv_path, chunk_size=50_000):
+        """Append rows of a pharma_amm_data.csv-shaped file added since the last import"""
+        source = os.path.abspath(csv_path)
+        row = self.db.execute("SELECT byte_offset FROM imports WHERE source = ?", (source,)).fetchone()
+
+        imported = 0
+        with open(csv_path, newline='') as f:
+            header = next(csv.reader([f.readline()]))
+            offset = row[0] if row else f.tell()
+            f.seek(offset)
+
+            # Manual line reads keep f.tell() usable, which csv.reader iteration would not
+            chunk = []
+            while True:
+                line = f.readline()
+                if line and line.strip():
+                    # Blank cells become NULL, not '' stored in a numeric column
+                    values = next(csv.reader([line]))
+                    chunk.append({name: value if value != '' else None for name, value in zip(header, values)})
+                if len(chunk) >= chunk_size or (not line and chunk):
+                    self.append(chunk)
+                    imported += len(chunk)
+                    chunk = []
+                    self._save_offset(source, f.tell())
+                if not line:
+                    break
+
+        return imported
+
+    def _save_offset(self, source, offset):
+        """Remember how far a CSV source has been imported"""
+        with self._lock:
+            self.db.execute("INSERT OR REPLACE INTO imports VALUES (?, ?)", (source, offset))
+            self.db.commit()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def benchmark(store, lookups=100_000):
+    """Mean and p99 lookup latency in microseconds over random existing keys"""
+    keys = [row[0] for row in store.db.execute(
+        "SELECT amm_number FROM records ORDER BY RANDOM() LIMIT ?", (min(lookups, 10_000),)
+    )]
+    if not keys:
+        raise ValueError("Record store is empty")
+
+    timings = []
+    for _ in range(lookups):
+        key = random.choice(keys)
+        start = time.perf_counter()
+        store.get(key)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    return {
+        'records': len(store),
+        'mean_us': sum(timings) / len(timings) * 1e6,
+        'p99_us': timings[int(len(timings) * 0.99)] * 1e6
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == 'import':
+        store = AMMRecordStore(sys.argv[3])
+        start = time.perf_counter()
+        count = store.import_csv(sys.argv[2])
+        print(f"✅ Imported {count} new records in {time.perf_counter() - start:.1f}s ({len(store)} total)")
+    elif len(sys.argv) == 3 and sys.argv[1] == 'bench':
+        stats = benchmark(AMMRecordStore(sys.argv[2]))
+        print(f"{stats['records']} records: mean {stats['mean_us']:.1f} µs, p99 {stats['p99_us']:.1f} µs per lookup")
+    else:
+        print("Usage:")
+        print("  Import new CSV rows: python record_store.py import <CSV_PATH> <DB_PATH>")
+        print("  Lookup benchmark:    python record_store.py bench <DB_PATH>")
+        sys.exit(1)
@@ -0,0 +1,144 @@
+# result_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def sha256_stream(stream, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a seekable binary stream, rewound afterwards"""
+    digest = hashlib.sha256()
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def _model_files(model_path):
+    """Files making up a model file or compiled forest directory"""
+    if os.path.isdir(model_path):
+        return [os.path.join(model_path, name) for name in sorted(os.listdir(model_path))]
+    return [model_path]
+
+
+def model_stat(model_path):
+    """(latest mtime, total size) of a model's files; changes whenever any of them is rewritten"""
+    # A directory's own mtime stays put when export_forest overwrites its files in place
+    stats = [os.stat(path) for path in _model_files(model_path)]
+    return max(st.st_mtime_ns for st in stats), sum(st.st_size for st in stats)
+
+
+def model_version(model_path):
+    """Short content hash of a model file or compiled forest directory"""
+    digest = hashlib.sha256()
+    for path in _model_files(model_path):
+        with open(path, 'rb') as f:
+            digest.update(sha256_stream(f).encode())
+    return digest.hexdigest()[:12]
+
+
+class ResultCache:
+    def __init__(self, max_entries=1024, db_path=None, ttl=7 * 24 * 3600, max_db_entries=100_000):
+        """In-memory LRU of validation results, optionally backed by SQLite"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_db_entries = max_db_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._db.commit()
+            self._db_count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, key):
+        """Return the cached result for key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM results WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created = json.loads(row[0]), row[1]
+                    if now - created <= self.ttl:
+                        self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, created, value)
+                        self.hits += 1
+                        return value
+                    self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._db_count -= 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store a JSON-serializable result under key"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+
+            if self._db is not None:
+                # INSERT OR REPLACE reports one row either way; only a new key grows the table
+                exists = self._db.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is not None
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now)
+                )
+                if not exists:
+                    self._db_count += 1
+                if self._db_count > self.max_db_entries:
+                    self._evict_db(now)
+                self._db.commit()
+
+    def _remember(self, key, created, value):
+        """Insert into the in-memory LRU, dropping the least recently used entry"""
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _evict_db(self, now):
+        """Drop expired rows, then the least recently used ones down to 90% of the limit"""
+        self._db.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        self._db_count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = self._db_count - int(self.max_db_entries * 0.9)
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY accessed LIMIT ?)",
+                (excess,)
+            )
+            self._db_count -= excess
+
+    def stats(self):
+        """Hit/miss counters and current sizes"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'memory_entries': len(self._entries),
+                'disk_entries': self._db_count if self._db is not None else None
+            }
@@ -0,0 +1,56 @@
+import pytest
+
+from amm_fields import FIELD_EXTRACTOR
+from bench_fields import (PAGE_ONE, inline_page, legacy_validate_amm_format, make_text,
+                          single_pass_validate_amm_format)
+
+
+@pytest.mark.parametrize('annex_lines', [0, 50])
+@pytest.mark.parametrize('fields_first', [True, False])
+def test_single_pass_matches_legacy_scans(annex_lines, fields_first):
+    """Required fields come out exactly as the eight separate searches found them"""
+    text = make_text(annex_lines, fields_first)
+    extracted = single_pass_validate_amm_format(text)
+
+    assert {k: extracted[k] for k in FIELD_EXTRACTOR.required} == legacy_validate_amm_format(text)
+
+
+@pytest.mark.parametrize('text', [
+    inline_page(),
+    inline_page(prefix=''),
+    'Page 1 ' + PAGE_ONE,
+    PAGE_ONE.replace('\nMédicament:', ' Médicament:').replace('\nFabricant:', '  Fabricant:'),
+    'Réf.Numéro AMM: AMM-1\n' + PAGE_ONE,
+])
+def test_mid_line_labels_match_legacy_scans(text):
+    """Labels are found anywhere in the text, not only at the start of a line"""
+    extracted = single_pass_validate_amm_format(text)
+
+    assert {k: extracted[k] for k in FIELD_EXTRACTOR.required} == legacy_validate_amm_format(text)
+
+
+def test_optional_fields_are_extracted():
+    extracted = FIELD_EXTRACTOR.extract(PAGE_ONE)
+
+    assert extracted["Pays d'Origine"] == 'France'
+    assert extracted['Conditions de Conservation'] == '2-8°C, max 60%'
+
+
+def test_first_valid_value_wins():
+    """An unparsable value is skipped in favour of a later valid one, like re.search"""
+    text = "Date Fabrication: inconnue\n" + PAGE_ONE.replace('2024-11-04', '2024-12-01')
+
+    assert FIELD_EXTRACTOR.extract(text)['Date Fabrication'] == '2024-12-01'
+    assert legacy_validate_amm_format(text)['Date Fabrication'] == '2024-12-01'
+
+
+def test_missing_fields_error_matches_legacy():
+    text = PAGE_ONE.replace('Fabricant:', 'Fab:').replace('Numéro de Lot:', 'Lot:')
+
+    with pytest.raises(ValueError) as legacy_error:
+        legacy_validate_amm_format(text)
+    with pytest.raises(ValueError) as single_error:
+        single_pass_validate_amm_format(text)
+
+    assert str(single_error.value) == str(legacy_error.value)
+    assert FIELD_EXTRACTOR.missing(FIELD_EXTRACTOR.extract(text)) == ['Fabricant', 'Numéro de Lot']
@@ -0,0 +1,61 @@
+import csv
+import os
+
+from amm_index import AMMIndex, IdentifierIndex, footprint
+from fraud_detector import PharmaFraudDetector
+from pdf_generator import generate_corpus
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_index_is_exact_across_growth_and_reopen(tmp_path):
+    path = str(tmp_path / 'ids')
+    index = IdentifierIndex(path, capacity=100, values=True)
+    keys = [f"AMM-2023-{i:06d}" for i in range(5000)]
+
+    assert index.add(keys[:3000], range(3000)) == 3000
+    # Re-added identifiers are not counted and keep their first value
+    assert index.add(keys, [7] * len(keys)) == 2000
+    assert len(index) == 5000
+
+    reopened = IdentifierIndex(path, create=False)
+    assert all(reopened.get(key) == (i if i < 3000 else 7) for i, key in enumerate(keys))
+    assert not any(f"AMM-2024-{i:06d}" in reopened for i in range(5000))
+
+
+def test_size_at_50m_identifiers(tmp_path):
+    """Files match footprint(), which stays within the documented budget at the 50M target"""
+    index = IdentifierIndex(str(tmp_path / 'ids'), capacity=10_000)
+    assert index.nbytes() == footprint(10_000)
+    index.add([f"AMM-2023-{i:06d}" for i in range(10_000)])
+    assert index.nbytes() == footprint(10_000)
+
+    bloom, table = footprint(50_000_000)
+    assert bloom < 60e6  # Every lookup touches only this part
+    assert table <= 500e6
+    assert footprint(50_000_000, values=True)[1] <= 750e6
+
+
+def test_validate_short_circuits_unknown_and_reused_identifiers(tmp_path):
+    corpus = str(tmp_path / 'corpus')
+    generate_corpus(6, corpus, seed=7, fraud_rate=0.0)
+    with open(os.path.join(corpus, 'manifest.csv'), newline='') as f:
+        rows = list(csv.DictReader(f))
+    unknown, reused, registered = rows[0], rows[1], rows[2]
+
+    index = AMMIndex(str(tmp_path / 'index'))
+    # Another dossier claimed the reused document's lot number first
+    index.add(['AMM-2023-999999'], [reused['lot_number']])
+    index.add([row['amm_number'] for row in rows[1:]], [row['lot_number'] for row in rows[1:]])
+
+    detector = PharmaFraudDetector(os.path.join(HERE, 'amm.joblib'), identifier_index=str(tmp_path / 'index'))
+
+    def validate(row):
+        with open(os.path.join(corpus, row['filename']), 'rb') as f:
+            return detector.validate_pdf(f)
+
+    assert validate(unknown)['rejection'] == 'unregistered_amm_number'
+    assert validate(reused)['rejection'] == 'duplicate_lot_number'
+    result = validate(registered)
+    assert 'rejection' not in result
+    assert 'engineered_features' in result
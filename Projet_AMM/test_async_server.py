@@ -0,0 +1,78 @@
+import asyncio
+import csv
+import os
+
+from async_server import MicroBatcher, create_async_app
+from fraud_detector import PharmaFraudDetector
+from pdf_generator import generate_corpus
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class RecordingDetector:
+    """Stands in for PharmaFraudDetector and remembers each batch it scored"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_batch(self, records):
+        self.batches.append(list(records))
+        if any(record.get('bad') for record in records):
+            raise ValueError("Prediction error: bad record")
+        return [{'status': 'VALID', 'value': record['value']} for record in records]
+
+    def predict_each(self, records):
+        return [ValueError("Prediction error: bad record") if record.get('bad')
+                else {'status': 'VALID', 'value': record['value']} for record in records]
+
+
+async def _score_all(batcher, records):
+    batcher.start()
+    try:
+        return await asyncio.gather(*[batcher.score(record) for record in records], return_exceptions=True)
+    finally:
+        await batcher.stop()
+
+
+def test_concurrent_requests_share_batches():
+    detector = RecordingDetector()
+    batcher = MicroBatcher(detector, max_batch_size=8, max_wait_ms=50)
+    results = asyncio.run(_score_all(batcher, [{'value': i} for i in range(20)]))
+
+    assert [r['value'] for r in results] == list(range(20))
+    assert [len(batch) for batch in detector.batches] == [8, 8, 4]
+    assert batcher.stats()['records'] == 20
+
+
+def test_bad_record_only_fails_its_own_request():
+    detector = RecordingDetector()
+    batcher = MicroBatcher(detector, max_batch_size=8, max_wait_ms=50)
+    records = [{'value': 0}, {'value': 1, 'bad': True}, {'value': 2}]
+    results = asyncio.run(_score_all(batcher, records))
+
+    assert results[0]['value'] == 0 and results[2]['value'] == 2
+    assert isinstance(results[1], ValueError)
+
+
+def test_validate_amm_end_to_end(tmp_path):
+    from aiohttp import FormData
+    from aiohttp.test_utils import TestClient, TestServer
+
+    generate_corpus(1, str(tmp_path), seed=8)
+    with open(os.path.join(str(tmp_path), 'manifest.csv'), newline='') as f:
+        row = next(csv.DictReader(f))
+    with open(os.path.join(str(tmp_path), row['filename']), 'rb') as f:
+        content = f.read()
+
+    async def post():
+        app = create_async_app(PharmaFraudDetector(os.path.join(HERE, 'amm_forest')))
+        async with TestClient(TestServer(app)) as client:
+            form = FormData()
+            form.add_field('file', content, filename=row['filename'], content_type='application/pdf')
+            response = await client.post('/validate_amm', data=form)
+            return response.status, await response.json()
+
+    status, result = asyncio.run(post())
+    assert status == 200
+    assert result['status'] in ('VALID', 'FRAUD')
+    assert result['extracted_data']['amm_number'] == row['amm_number']
@@ -0,0 +1,23 @@
+from bench_pipeline import compare
+
+
+def report(calibration_ms, **results):
+    return {'meta': {}, 'results': {
+        name: {**metrics, 'calibration_ms': calibration_ms} for name, metrics in results.items()
+    }}
+
+
+def test_regressions_beyond_threshold_fail():
+    baseline = report(10.0, predict_fast={'p50_ms': 1.0}, score_csv={'ops_per_s': 1000.0})
+
+    assert compare(report(10.0, predict_fast={'p50_ms': 1.2}, score_csv={'ops_per_s': 900.0}), baseline, 0.25) == []
+    failures = compare(report(10.0, predict_fast={'p50_ms': 1.5}, score_csv={'ops_per_s': 700.0}), baseline, 0.25)
+    assert [failure.split()[0] for failure in failures] == ['predict_fast', 'score_csv']
+
+
+def test_slower_host_is_discounted():
+    baseline = report(10.0, predict_fast={'p50_ms': 1.0}, score_csv={'ops_per_s': 1000.0})
+    # Everything twice as slow, calibration included: not a code regression
+    current = report(20.0, predict_fast={'p50_ms': 2.0}, score_csv={'ops_per_s': 500.0})
+
+    assert compare(current, baseline, 0.25) == []
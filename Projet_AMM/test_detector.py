@@ -1,10 +1,20 @@
-from fraud_detector import PharmaFraudDetector
+import csv
+import io
+import os
 
-# Initialize detector (uses default paths)
-detector = PharmaFraudDetector()
+import joblib
+import pandas as pd
+import pytest
 
-# Example input matching your original data format
-sample_record = {
+from fraud_detector import PharmaFraudDetector, create_flask_app
+from pdf_generator import generate_corpus
+from record_store import AMMRecordStore
+from test_predict_fast import RAW_COLUMNS, legacy_predict
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Example input matching the original data format
+SAMPLE_RECORD = {
     'amm_number': 'AMM-2023-999',
     'product_name': 'FlexiJoint',
     'manufacturer': 'PharmaCorp',
@@ -17,16 +27,146 @@ sample_record = {
     'production_cost': 12.75
 }
 
-# Make prediction
-result = detector.predict(sample_record)
-print("\nPrediction Results:")
-print(f"Is Fraud: {result['is_fraud']}")
-print(f"Probability: {result['probability']:.2%}")
-print("\nEngineered Features:")
-for k, v in result['engineered_features'].items():
-    print(f"{k}: {v}")
-
-# Test error handling
-print("\nTesting error handling:")
-bad_record = {'manufacturer': 'Unknown'}
-print(detector.predict(bad_record))
\ No newline at end of file
+
+@pytest.fixture(scope='module')
+def detector():
+    return PharmaFraudDetector(os.path.join(HERE, 'amm.joblib'))
+
+
+def test_predict_returns_status_probability_and_features(detector):
+    result = detector.predict(SAMPLE_RECORD)
+
+    assert result['status'] in ('VALID', 'FRAUD')
+    assert 0.0 <= result['probability'] <= 1.0
+    assert result['engineered_features'] == {
+        'approval_days': 75,
+        'price_ratio': 11.8,
+        'batch_variation': 1.2,
+        'is_fast_track': False
+    }
+
+
+def test_predict_rejects_incomplete_records(detector):
+    with pytest.raises(ValueError, match="Prediction error"):
+        detector.predict({'manufacturer': 'Unknown'})
+
+
+def test_predict_batch_matches_the_original_single_record_path(detector):
+    df = pd.read_csv(os.path.join(HERE, 'processed_pharma_data.csv'))
+    records = df[RAW_COLUMNS].iloc[:24].to_dict('records') + [
+        SAMPLE_RECORD,
+        {**SAMPLE_RECORD, 'approval_date': '2023-05-20', 'manufacturer': 'CureAll'},
+        {**SAMPLE_RECORD, 'price_per_unit': 20.0, 'manufacturer': 'Not In Training'},
+        {**SAMPLE_RECORD, 'batch_size': 5000, 'reported_side_effects': 0, 'manufacturer': 'MediVita'},
+    ]
+    model = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    expected = [legacy_predict(model, record) for record in records]
+
+    assert {result['status'] for result in expected} == {'VALID', 'FRAUD'}
+    assert detector.predict_batch(records) == expected
+
+
+def test_batch_endpoint_reports_scoring_errors_per_file(tmp_path):
+    corpus = str(tmp_path / 'corpus')
+    generate_corpus(3, corpus, seed=9)
+    with open(os.path.join(corpus, 'manifest.csv'), newline='') as f:
+        rows = list(csv.DictReader(f))
+
+    # The registry gives the second document a zero production cost, which cannot be scored
+    rows[1]['production_cost'] = '0'
+    records = AMMRecordStore(str(tmp_path / 'records.db'))
+    records.append([{name: row[name] for name in (
+        'amm_number', 'product_name', 'manufacturer', 'submission_date', 'approval_date',
+        'clinical_trial_participants', 'reported_side_effects', 'batch_size', 'price_per_unit', 'production_cost'
+    )} for row in rows])
+
+    app = create_flask_app(cache_size=0, records_path=str(tmp_path / 'records.db'),
+                           model_path=os.path.join(HERE, 'amm.joblib'))
+    files = [(open(os.path.join(corpus, row['filename']), 'rb'), row['filename']) for row in rows]
+    try:
+        response = app.test_client().post('/validate_amm_batch', data={'files': files})
+    finally:
+        for f, _ in files:
+            f.close()
+
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['filename'] for r in results] == [row['filename'] for row in rows]
+    assert 'error' in results[1] and 'status' not in results[1]
+    assert all(r['status'] in ('VALID', 'FRAUD') for r in (results[0], results[2]))
+
+
+def test_upload_over_the_limit_is_rejected_with_413():
+    app = create_flask_app(cache_size=0)
+    app.config['MAX_CONTENT_LENGTH'] = 4096
+    response = app.test_client().post('/validate_amm', data={'file': (io.BytesIO(b'%PDF' * 2048), 'big.pdf')})
+
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'Upload exceeds the 4096 byte limit'}
+
+
+def test_small_uploads_stay_in_memory_and_large_ones_spool_to_disk():
+    from flask import request
+
+    app = create_flask_app(cache_size=0)
+    app.config['UPLOAD_SPOOL_SIZE'] = 1024
+
+    @app.route('/spooled', methods=['POST'])
+    def spooled():
+        stream = request.files['file'].stream
+        return {'on_disk': stream._rolled, 'size': len(stream.read())}
+
+    client = app.test_client()
+    small = client.post('/spooled', data={'file': (io.BytesIO(b'x' * 512), 'small.pdf')}).get_json()
+    large = client.post('/spooled', data={'file': (io.BytesIO(b'x' * 8192), 'large.pdf')}).get_json()
+
+    assert small == {'on_disk': False, 'size': 512}
+    assert large == {'on_disk': True, 'size': 8192}
+
+
+def cover_pages_first(pdf_path, covers):
+    """PDF bytes of pdf_path behind covers blank pages, so its fields start on page covers + 1"""
+    from PyPDF2 import PdfReader, PdfWriter
+
+    reader = PdfReader(pdf_path)
+    writer = PdfWriter()
+    for _ in range(covers):
+        writer.add_blank_page(width=595, height=842)
+    for page in reader.pages:
+        writer.add_page(page)
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def test_text_budgets_are_configurable_and_extraction_stops_early(tmp_path):
+    generate_corpus(1, str(tmp_path), seed=4, extra_pages=3)
+    with open(os.path.join(str(tmp_path), 'manifest.csv'), newline='') as f:
+        pdf_path = os.path.join(str(tmp_path), next(csv.DictReader(f))['filename'])
+    late_fields = cover_pages_first(pdf_path, covers=2)
+
+    def validate(content, **options):
+        app = create_flask_app(cache_size=0, **options)
+        try:
+            return app.test_client().post('/validate_amm', data={'file': (io.BytesIO(content), 'amm.pdf')})
+        finally:
+            if 'pdf_worker_pool' in app.extensions:
+                app.extensions['pdf_worker_pool'].close()
+
+    # All fields are on the attestation page: the annex pages after it are never read
+    with open(pdf_path, 'rb') as f:
+        content = f.read()
+    response = validate(content)
+    assert response.status_code == 200
+    assert response.get_json()['extracted_data']['pages_read'] == 1
+    assert validate(late_fields).get_json()['extracted_data']['pages_read'] == 3
+
+    # Worker processes get the same budget as the request thread
+    for workers in (0, 1):
+        response = validate(late_fields, max_pages=2, pdf_workers=workers)
+        assert response.status_code == 500
+        assert response.get_json()['error'].endswith("(searched 2 page(s))")
+
+    response = validate(content, max_chars=100)
+    assert response.status_code == 500
+    assert 'exceeds the 100 character budget' in response.get_json()['error']
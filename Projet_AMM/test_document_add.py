@@ -0,0 +1,40 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from document_add import generate_dataset
+
+
+def test_shards_reproduce_the_unsharded_dataset(tmp_path):
+    """Shards cover disjoint ID ranges and concatenate to the single-file output"""
+    single, rows, _ = generate_dataset(str(tmp_path / 'all.csv'), 2500, seed=7, chunk_size=400)
+    paths, sharded_rows, _ = generate_dataset(str(tmp_path / 'part.csv'), 2500, seed=7, chunk_size=400, shards=3)
+
+    whole = pd.read_csv(single[0])
+    parts = pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+    assert rows == sharded_rows == 2500 and len(paths) == 3
+    pd.testing.assert_frame_equal(whole, parts)
+    # Fixed-width numbers keep lexical and numeric order identical past 999
+    assert list(whole['amm_number']) == sorted(whole['amm_number'])
+    assert whole['amm_number'].iloc[-1] == 'AMM-2023-2500'
+
+
+def test_columnar_output_matches_csv(tmp_path):
+    csv_paths, _, _ = generate_dataset(str(tmp_path / 'all.csv'), 1200, seed=3, chunk_size=500)
+    npy_paths, _, _ = generate_dataset(str(tmp_path / 'cols'), 1200, seed=3, chunk_size=500, fmt='npy')
+
+    df = pd.read_csv(csv_paths[0])
+    with open(os.path.join(npy_paths[0], 'meta.json')) as f:
+        meta = json.load(f)
+    columns = {name: np.load(os.path.join(npy_paths[0], f"{name}.npy"), mmap_mode='r') for name in
+               ('amm_id', 'manufacturer', 'approval_date', 'price_per_unit', 'is_fraud')}
+
+    assert meta['rows'] == 1200
+    assert [meta['amm_number_format'].format(i) for i in columns['amm_id']] == list(df['amm_number'])
+    assert [meta['manufacturer'][i] for i in columns['manufacturer']] == list(df['manufacturer'])
+    assert list(np.datetime_as_string(columns['approval_date'])) == list(df['approval_date'])
+    assert np.allclose(columns['price_per_unit'], df['price_per_unit'])
+    assert list(columns['is_fraud'].astype(int)) == list(df['is_fraud'])
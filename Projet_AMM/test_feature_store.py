@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from feature_store import FeatureStore, csv_schema, score_store
+from fraud_detector import PharmaFraudDetector, load_model
+from train import train_from_store
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(HERE, 'pharma_amm_data.csv')
+
+
+def test_incremental_updates_match_a_single_build(tmp_path):
+    with open(DATA, 'rb') as f:
+        lines = f.readlines()
+    csv_path = str(tmp_path / 'growing.csv')
+    schema = csv_schema(DATA)
+
+    full = FeatureStore.create(str(tmp_path / 'full'), schema)
+    assert full.update_from_csv(DATA, chunk_size=64) == len(lines) - 1
+
+    store = FeatureStore.create(str(tmp_path / 'incremental'), schema)
+    # Odd cut points leave partially filled bytes in the packed columns
+    for stop in (1, 4, 38, 517, len(lines)):
+        with open(csv_path, 'wb') as f:
+            f.writelines(lines[:stop])
+        store.update_from_csv(csv_path, chunk_size=50)
+    # A half-written row waits for the next update
+    with open(csv_path, 'ab') as f:
+        f.write(lines[1][:10])
+    assert store.update_from_csv(csv_path) == 0
+
+    reopened = FeatureStore(str(tmp_path / 'incremental'))
+    assert len(reopened) == len(full)
+    assert np.array_equal(reopened.matrix(), full.matrix())
+    assert np.array_equal(reopened.labels(), full.labels())
+    assert np.array_equal(reopened.matrix(333, 701), full.matrix()[333:701])
+    assert reopened.amm_numbers(5, 9) == pd.read_csv(DATA)['amm_number'][5:9].tolist()
+
+
+def test_store_scores_and_trains_like_the_csv(tmp_path):
+    model_path = os.path.join(HERE, 'amm.joblib')
+    store_path = str(tmp_path / 'features')
+    FeatureStore.create(store_path, load_model(model_path)[2]).update_from_csv(DATA)
+
+    score_store(store_path, str(tmp_path / 'scores.csv'), model_path, chunk_size=300)
+    scores = pd.read_csv(tmp_path / 'scores.csv')
+    expected = PharmaFraudDetector(model_path).score_frame(pd.read_csv(DATA))
+    assert scores['amm_number'].tolist() == expected['amm_number'].tolist()
+    assert np.allclose(scores['probability'], expected['probability'])
+
+    result = train_from_store(store_path, str(tmp_path / 'bundle.joblib'), n_estimators=10, n_jobs=1, max_rows=600)
+    detector = PharmaFraudDetector(result['output'])
+    assert detector.model_version == result['version']
+    assert detector.features == load_model(model_path)[2]['features']
+
+
+def test_rows_that_cannot_be_scored_get_an_error(tmp_path):
+    model_path = os.path.join(HERE, 'amm.joblib')
+    df = pd.read_csv(DATA, nrows=20)
+    df.loc[7, 'production_cost'] = 0
+    csv_path = str(tmp_path / 'zero_cost.csv')
+    df.to_csv(csv_path, index=False)
+    store_path = str(tmp_path / 'features')
+    FeatureStore.create(store_path, load_model(model_path)[2]).update_from_csv(csv_path)
+
+    score_store(store_path, str(tmp_path / 'scores.csv'), model_path)
+    scores = pd.read_csv(tmp_path / 'scores.csv', keep_default_na=False)
+    expected = PharmaFraudDetector(model_path).score_frame(df)
+
+    assert 'price_to_cost_ratio' in scores['error'][7]
+    assert scores['error'].tolist() == expected['error'].tolist()
+    assert scores['predicted'][7] == ''
+    valid = expected.index != 7
+    assert scores['predicted'][valid].astype(int).tolist() == expected['predicted'][valid].tolist()
+    assert np.allclose(scores['probability'][valid].astype(float), expected['probability'][valid])
+
+
+def test_missing_fields_are_reported_not_scored_or_trained_on(tmp_path):
+    model_path = os.path.join(HERE, 'amm.joblib')
+    df = pd.read_csv(DATA, nrows=600)
+    df.loc[3, 'approval_date'] = None
+    df.loc[5, 'clinical_trial_participants'] = None
+    csv_path = str(tmp_path / 'gaps.csv')
+    df.to_csv(csv_path, index=False)
+    store_path = str(tmp_path / 'features')
+    store = FeatureStore.create(store_path, load_model(model_path)[2])
+    store.update_from_csv(csv_path)
+
+    # Stored as NaN, not as an int32 sentinel that would look like a real value
+    assert np.isnan(store.column('approval_time')[3])
+    assert np.isnan(store.column('clinical_trial_participants')[5])
+
+    score_store(store_path, str(tmp_path / 'scores.csv'), model_path)
+    scores = pd.read_csv(tmp_path / 'scores.csv', keep_default_na=False)
+    expected = PharmaFraudDetector(model_path).score_frame(df)
+    assert scores['error'].tolist() == expected['error'].tolist()
+    assert 'approval_time' in scores['error'][3]
+    assert 'clinical_trial_participants' in scores['error'][5]
+    assert scores['predicted'][3] == scores['predicted'][5] == ''
+
+    result = train_from_store(store_path, str(tmp_path / 'bundle.joblib'), n_estimators=5, n_jobs=1)
+    assert result['rows_skipped'] == 2
+    assert result['rows_sampled'] == 600
@@ -0,0 +1,83 @@
+import os
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.exceptions import InconsistentVersionWarning
+
+from forest_engine import CompiledForest, export_forest
+from fraud_detector import PharmaFraudDetector, load_model
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
+
+
+def test_compiled_forest_is_bit_identical_to_sklearn(tmp_path):
+    """Exported arrays must reproduce sklearn's probabilities exactly"""
+    model = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    X = pd.read_csv(os.path.join(HERE, 'model_predictions.csv'))[list(model.feature_names_in_)]
+
+    forest = CompiledForest(export_forest(model, str(tmp_path / 'forest')))
+
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+    assert np.array_equal(forest.predict(X), model.predict(X))
+
+    # Features sklearn refuses are refused with the same error, not scored
+    for value in (np.inf, -np.inf, 1e300):
+        bad = X.copy()
+        bad.iloc[3, 1] = value
+        with pytest.raises(ValueError) as sklearn_error:
+            model.predict_proba(bad)
+        with pytest.raises(ValueError) as forest_error:
+            forest.predict_proba(bad)
+        assert str(forest_error.value) == str(sklearn_error.value)
+
+    bad = X.copy()
+    bad.iloc[3, 1] = np.nan
+    with pytest.raises(ValueError, match="Input X contains NaN"):
+        forest.predict(bad)
+
+
+@pytest.mark.parametrize('model_name', ['amm.joblib', 'amm_forest'])
+def test_detector_rejects_non_finite_features_on_both_backends(model_name):
+    detector = PharmaFraudDetector(os.path.join(HERE, model_name))
+    record = {
+        'manufacturer': 'PharmaCorp', 'submission_date': '2023-05-01', 'approval_date': '2023-07-15',
+        'clinical_trial_participants': 800, 'reported_side_effects': 30, 'batch_size': 150000,
+        'price_per_unit': 150.50, 'production_cost': 0.0
+    }
+
+    with pytest.raises(ValueError, match="Input X contains infinity"):
+        detector.predict_batch([record])
+    with pytest.raises(ValueError, match="Input X contains NaN"):
+        detector.predict_batch([{**record, 'production_cost': 12.75, 'batch_size': float('nan')}])
+
+
+def test_shipped_compiled_forest_matches_pickle():
+    """The committed amm_forest/ must stay in sync with amm.joblib"""
+    model = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    X = pd.read_csv(os.path.join(HERE, 'model_predictions.csv'))[list(model.feature_names_in_)]
+
+    forest = CompiledForest(os.path.join(HERE, 'amm_forest'))
+
+    assert np.array_equal(forest.predict_proba(X), model.predict_proba(X))
+
+
+def test_forest_re_exported_in_place_is_reloaded(tmp_path):
+    """Overwriting the arrays keeps the directory mtime, yet new detectors get the new trees"""
+    model = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    path = export_forest(model, str(tmp_path / 'forest'))
+    old = PharmaFraudDetector(path)
+
+    small = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    small.estimators_ = small.estimators_[:5]
+    small.n_estimators = 5
+    export_forest(small, path)
+    new = PharmaFraudDetector(path)
+
+    assert new.model_version != old.model_version
+    assert load_model(path)[0] is new.model
+    assert new.model.n_estimators == 5
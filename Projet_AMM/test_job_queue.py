@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+
+from fraud_detector import PharmaFraudDetector, create_flask_app
+from job_queue import JobRunner, JobStore
+from pdf_generator import generate_corpus
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def corpus_pdfs(out_dir, count):
+    generate_corpus(count, out_dir, seed=3)
+    with open(os.path.join(out_dir, 'manifest.csv'), newline='') as f:
+        names = [row['filename'] for row in csv.DictReader(f)]
+    pdfs = []
+    for name in names:
+        with open(os.path.join(out_dir, name), 'rb') as f:
+            pdfs.append((name, f.read()))
+    return pdfs
+
+
+def test_archive_job_streams_ndjson_results(tmp_path):
+    pdfs = corpus_pdfs(str(tmp_path / 'corpus'), 5)
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w') as z:
+        for name, data in pdfs:
+            z.writestr(f'batch/{name}', data)
+        z.writestr('batch/broken.pdf', b'not a pdf')
+        z.writestr('batch/readme.txt', b'skipped')
+    archive.seek(0)
+
+    app = create_flask_app(cache_size=0, jobs_db=str(tmp_path / 'jobs.db'), job_workers=0)
+    client = app.test_client()
+    response = client.post('/jobs', data={'archive': (archive, 'batch.zip')})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['total'] == 6
+
+    deadline = time.monotonic() + 60
+    while client.get(job['status_url']).get_json()['status'] != 'done':
+        assert time.monotonic() < deadline
+        time.sleep(0.1)
+
+    lines = client.get(job['results_url']).get_data(as_text=True).splitlines()
+    results = [json.loads(line) for line in lines]
+    assert sorted(r['filename'] for r in results) == sorted([name for name, _ in pdfs] + ['broken.pdf'])
+    assert [r for r in results if 'error' in r][0]['filename'] == 'broken.pdf'
+    assert all(r['status'] in ('VALID', 'FRAUD') for r in results if 'error' not in r)
+    assert client.get(job['status_url']).get_json()['errors'] == 1
+
+
+def test_unfinished_documents_survive_a_restart(tmp_path):
+    pdfs = corpus_pdfs(str(tmp_path / 'corpus'), 3)
+    db_path = str(tmp_path / 'jobs.db')
+    store = JobStore(db_path)
+    job_id = store.submit(pdfs)
+    assert store.claim() is not None  # Claimed, then the process "stops"
+    store.close()
+
+    store = JobStore(db_path)
+    assert store.pending() == 3
+    runner = JobRunner(store, PharmaFraudDetector(os.path.join(HERE, 'amm.joblib')), poll_interval=0.05)
+    runner.start()
+    deadline = time.monotonic() + 60
+    while store.status(job_id)['status'] != 'done':
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    runner.stop()
+
+    assert [r['seq'] for r in sorted(store.results(job_id), key=lambda r: r['seq'])] == [0, 1, 2]
+    assert not os.path.exists(os.path.join(store.files_dir, job_id))
+
+
+def test_corrupt_archive_is_a_bad_request(tmp_path):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as z:
+        z.writestr('batch/a.pdf', b'A' * 100)
+    # Same sizes and headers, but the member no longer matches its CRC
+    corrupt = archive.getvalue().replace(b'A' * 100, b'B' * 100)
+
+    app = create_flask_app(cache_size=0, jobs_db=str(tmp_path / 'jobs.db'), job_workers=0)
+    response = app.test_client().post('/jobs', data={'archive': (io.BytesIO(corrupt), 'batch.zip')})
+    assert response.status_code == 400
+    assert 'CRC' in response.get_json()['error']
+    assert os.listdir(str(tmp_path / 'jobs.db.files')) == []
@@ -0,0 +1,41 @@
+import os
+
+from metrics import Counter, Histogram, SlowRequestProfiler, capture_stages, observe_stage
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('test_seconds', "Test latency", 'stage', buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe('parse', seconds)
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{stage="parse",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{stage="parse",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{stage="parse",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{stage="parse"} 4' in lines
+
+
+def test_counter_renders_each_label():
+    counter = Counter('test_total', "Test outcomes", 'outcome')
+    counter.inc('VALID')
+    counter.inc('FRAUD', 2)
+
+    assert counter.render()[2:] == ['test_total{outcome="FRAUD"} 2', 'test_total{outcome="VALID"} 1']
+
+
+def test_capture_collects_stage_timings():
+    with capture_stages() as timings:
+        observe_stage('pdf_extraction', 0.25)
+    observe_stage('pdf_extraction', 0.5)
+
+    assert timings == [('pdf_extraction', 0.25)]
+
+
+def test_profiler_keeps_only_the_slowest(tmp_path):
+    profiler = SlowRequestProfiler(2, str(tmp_path))
+    for n in (10, 200_000, 1000, 100_000):
+        assert profiler.run('sum', sum, range(n)) == sum(range(n))
+
+    kept = profiler.slowest()
+    assert len(kept) == 2 and len(os.listdir(tmp_path)) == 2
+    assert all(os.path.exists(path) for _, path in kept)
@@ -0,0 +1,76 @@
+import csv
+import hashlib
+import io
+import os
+
+import qrcode
+from fpdf import FPDF
+
+from fraud_detector import PharmaFraudDetector
+from pdf_generator import CORPUS_CREATION_DATE, PDFGenerator, corpus_number_width, generate_corpus
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def read_manifest(out_dir):
+    with open(os.path.join(out_dir, 'manifest.csv'), newline='') as f:
+        return list(csv.DictReader(f))
+
+
+def test_corpus_is_deterministic_and_hashed(tmp_path):
+    generate_corpus(12, str(tmp_path / 'a'), seed=5, batch_size=5)
+    generate_corpus(12, str(tmp_path / 'b'), seed=5, processes=2, batch_size=5)
+    first, second = read_manifest(tmp_path / 'a'), read_manifest(tmp_path / 'b')
+
+    assert first == second
+    assert {row['expected_label'] for row in first} == {'VALID', 'FRAUD'}
+    for row in first:
+        with open(tmp_path / 'a' / row['filename'], 'rb') as f:
+            assert hashlib.sha256(f.read()).hexdigest() == row['sha256']
+
+
+def test_corpus_documents_pass_field_extraction(tmp_path):
+    generate_corpus(6, str(tmp_path), seed=1, extra_pages=3)
+    detector = PharmaFraudDetector(os.path.join(HERE, 'amm.joblib'))
+
+    for row in read_manifest(tmp_path):
+        extracted = detector.process_pdf(str(tmp_path / row['filename']))
+        assert extracted['amm_number'] == row['amm_number']
+        assert extracted['manufacturer'] == row['manufacturer']
+        # Annex pages follow the attestation, so extraction stops on page one
+        assert extracted['pages_read'] == 1 and row['pages'] == '4'
+
+
+def test_legacy_qr_code_keeps_the_best_mask_and_png_rendering():
+    data = 'AMM:AMM-2023-1234|HASH:0123456789abcdef0123456789abcdef'
+
+    def page():
+        pdf = FPDF()
+        pdf.set_creation_date(CORPUS_CREATION_DATE)
+        pdf.add_page()
+        return pdf
+
+    # The add_qr_code body create_amm_pdf was written against
+    original = page()
+    qr = qrcode.QRCode(version=1, box_size=2, border=2)
+    qr.add_data(data)
+    qr.make(fit=True)
+    img_bytes = io.BytesIO()
+    qr.make_image(fill_color="black", back_color="white").save(img_bytes, format='PNG')
+    img_bytes.seek(0)
+    original.image(img_bytes, x=160, y=100, w=30)
+
+    legacy = page()
+    PDFGenerator(str(HERE)).add_qr_code(legacy, data, x=160, y=100)
+    assert bytes(legacy.output()) == bytes(original.output())
+
+
+def test_corpus_numbers_stay_fixed_width_past_a_million_documents():
+    generator = PDFGenerator(str(HERE))
+    assert corpus_number_width(999_999) == 6
+    assert corpus_number_width(1_000_000) == 7
+
+    width = corpus_number_width(1_000_000)
+    first = generator.corpus_document(0, seed=1, width=width)['num_amm']
+    last = generator.corpus_document(999_999, seed=1, width=width)['num_amm']
+    assert first == 'AMM-2023-0000001' and last == 'AMM-2023-1000000'
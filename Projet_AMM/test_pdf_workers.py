@@ -0,0 +1,108 @@
+import io
+import os
+import threading
+import time
+
+import pytest
+
+import pdf_workers
+from fraud_detector import create_flask_app, error_status
+from pdf_workers import PDFWorkerPool, PoolSaturated, WorkerCrashed
+
+
+def scripted_worker(conn, model_path, records_path, index_path, max_pages, max_chars):
+    """Stands in for _worker_main: the PDF bytes say how the task behaves"""
+    conn.send(('ready', None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task == b'crash':
+            os._exit(1)
+        if task == b'hang':
+            time.sleep(3600)
+        if task == b'slow':
+            time.sleep(1.0)
+        conn.send(('ok', {'pid': os.getpid()}, []))
+
+
+@pytest.fixture
+def scripted(monkeypatch):
+    # Spawned workers import this module by name, so the replacement target pickles
+    monkeypatch.setattr(pdf_workers, '_worker_main', scripted_worker)
+
+
+def test_crashed_worker_is_replaced(scripted):
+    pool = PDFWorkerPool(1)
+    try:
+        first = pool.process_pdf(b'ok')['pid']
+        with pytest.raises(WorkerCrashed):
+            pool.process_pdf(b'crash')
+        second = pool.process_pdf(b'ok')['pid']
+        assert second != first
+        assert pool.process_pdf(b'ok')['pid'] == second
+    finally:
+        pool.close()
+
+
+def test_stuck_task_times_out_and_its_worker_is_recycled(scripted):
+    pool = PDFWorkerPool(1, task_timeout=0.5)
+    try:
+        first = pool.process_pdf(b'ok')['pid']
+        start = time.monotonic()
+        with pytest.raises(TimeoutError) as excinfo:
+            pool.process_pdf(b'hang')
+        assert time.monotonic() - start < 5
+        assert error_status(excinfo.value) == 504
+        assert pool.process_pdf(b'ok')['pid'] != first
+    finally:
+        pool.close()
+
+
+def test_full_queue_is_rejected_without_waiting(scripted):
+    pool = PDFWorkerPool(1, max_queue=1)
+    try:
+        pool.process_pdf(b'ok')  # Worker loaded
+        busy = [threading.Thread(target=pool.process_pdf, args=(b'slow',)) for _ in range(2)]
+        for thread in busy:
+            thread.start()
+        time.sleep(0.3)
+
+        # One task running and one waiting fill the pool
+        with pytest.raises(PoolSaturated) as excinfo:
+            pool.process_pdf(b'ok')
+        assert error_status(excinfo.value) == 503
+        for thread in busy:
+            thread.join()
+        assert 'pid' in pool.process_pdf(b'ok')
+    finally:
+        pool.close()
+
+
+def test_health_answers_while_every_worker_is_busy(scripted):
+    app = create_flask_app(pdf_workers=1, task_timeout=3.0, max_queue=0, cache_size=0)
+    pool = app.extensions['pdf_worker_pool']
+    try:
+        pool.process_pdf(b'ok')  # Worker loaded
+        statuses = []
+
+        def upload(content):
+            response = app.test_client().post('/validate_amm', data={'file': (io.BytesIO(content), 'amm.pdf')})
+            statuses.append(response.status_code)
+
+        stuck = threading.Thread(target=upload, args=(b'hang',))
+        stuck.start()
+        time.sleep(0.3)
+
+        start = time.monotonic()
+        assert app.test_client().get('/health').status_code == 200
+        assert time.monotonic() - start < 1.0
+        upload(b'ok')
+        assert statuses == [503]
+
+        stuck.join()
+        assert statuses == [503, 504]
+    finally:
+        pool.close()
+
@@ -0,0 +1,60 @@
+import os
+
+import joblib
+import pandas as pd
+import pytest
+
+from fraud_detector import DEFAULT_MODEL, FEATURES, MANUFACTURERS, MEDIAN_BATCH, PharmaFraudDetector
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+RAW_COLUMNS = [
+    'amm_number', 'product_name', 'manufacturer', 'submission_date', 'approval_date',
+    'clinical_trial_participants', 'reported_side_effects', 'batch_size',
+    'price_per_unit', 'production_cost'
+]
+
+
+def legacy_predict(model, data):
+    """Frozen copy of the original predict(): a one-row DataFrame, then predict_proba and predict"""
+    df = pd.DataFrame([data])
+    df['submission_date'] = pd.to_datetime(df['submission_date'])
+    df['approval_date'] = pd.to_datetime(df['approval_date'])
+    df['approval_time'] = (df['approval_date'] - df['submission_date']).dt.days
+    df['price_to_cost_ratio'] = df['price_per_unit'] / df['production_cost']
+    df['batch_size_variation'] = df['batch_size'] / MEDIAN_BATCH
+    df['fast_approval'] = (df['approval_time'] < 30).astype(int)
+    for mfg in MANUFACTURERS:
+        df[f'manufacturer_{mfg}'] = (df['manufacturer'] == mfg).astype(int)
+
+    proba = model.predict_proba(df[FEATURES])[0][1]
+    is_fraud = model.predict(df[FEATURES])[0]
+    return {
+        'status': "FRAUD" if is_fraud else "VALID",
+        'probability': float(proba),
+        'engineered_features': {
+            'approval_days': int(df['approval_time'].iloc[0]),
+            'price_ratio': round(df['price_to_cost_ratio'].iloc[0], 1),
+            'batch_variation': round(df['batch_size_variation'].iloc[0], 2),
+            'is_fast_track': bool(df['fast_approval'].iloc[0])
+        }
+    }
+
+
+@pytest.fixture(scope='module')
+def legacy_results():
+    """(record, original prediction) for every fourth processed record; the legacy path takes ~15 ms each"""
+    model = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    df = pd.read_csv(os.path.join(HERE, 'processed_pharma_data.csv'))
+    records = df[RAW_COLUMNS].iloc[::4].to_dict('records')
+    return [(record, legacy_predict(model, record)) for record in records]
+
+
+@pytest.mark.parametrize('model_name', ['amm.joblib', DEFAULT_MODEL])
+def test_predict_fast_matches_the_original_pandas_path(model_name, legacy_results):
+    """The NumPy fast path must agree with the original predict(), on either model format"""
+    detector = PharmaFraudDetector(os.path.join(HERE, model_name))
+
+    assert {expected['status'] for _, expected in legacy_results} == {'VALID', 'FRAUD'}
+    for record, expected in legacy_results:
+        assert detector.predict_fast(record) == expected, record['amm_number']
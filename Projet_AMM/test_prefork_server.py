@@ -0,0 +1,95 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import joblib
+
+from forest_engine import export_forest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+SERVER = """
+import sys
+sys.path.insert(0, {here!r})
+from fraud_detector import create_flask_app
+from prefork_server import PreforkServer
+
+def build_app(loaded_model):
+    return create_flask_app(cache_size=0, model_path={model!r}, loaded_model=loaded_model)
+
+PreforkServer(build_app, {model!r}, host='127.0.0.1', port={port}, workers=2, watch_interval=0.2).serve_forever()
+"""
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_version(port, accept, timeout=60.0):
+    """Poll /health until its model_version satisfies accept"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=5) as response:
+                version = json.load(response)['model_version']
+            if accept(version):
+                return version
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise AssertionError("Server did not report the expected model version")
+
+
+def test_model_file_is_hot_swapped(tmp_path):
+    model_path = str(tmp_path / 'model.joblib')
+    model = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    joblib.dump(model, model_path, compress=3)
+
+    port = free_port()
+    script = tmp_path / 'server.py'
+    script.write_text(SERVER.format(here=HERE, model=model_path, port=port))
+    server = subprocess.Popen([sys.executable, str(script)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first = wait_for_version(port, lambda version: True)
+
+        # Same trees, different bytes: a new version that passes validation
+        joblib.dump(model, str(tmp_path / 'new.joblib'), compress=0)
+        os.replace(tmp_path / 'new.joblib', model_path)
+        second = wait_for_version(port, lambda version: version != first)
+
+        # A broken file is rejected and the validated model keeps serving
+        (tmp_path / 'broken.joblib').write_bytes(b'not a model')
+        os.replace(tmp_path / 'broken.joblib', model_path)
+        time.sleep(1.0)
+        assert wait_for_version(port, lambda version: True) == second
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
+
+
+def test_forest_re_exported_in_place_is_hot_swapped(tmp_path):
+    model = joblib.load(os.path.join(HERE, 'amm.joblib'))
+    forest_path = export_forest(model, str(tmp_path / 'forest'))
+
+    port = free_port()
+    script = tmp_path / 'server.py'
+    script.write_text(SERVER.format(here=HERE, model=forest_path, port=port))
+    server = subprocess.Popen([sys.executable, str(script)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        first = wait_for_version(port, lambda version: True)
+
+        # Same directory, overwritten arrays: the directory's own mtime does not change
+        model.estimators_ = model.estimators_[:5]
+        model.n_estimators = 5
+        export_forest(model, forest_path, version='five-trees')
+        assert wait_for_version(port, lambda version: version != first) == 'five-trees'
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=30) == 0
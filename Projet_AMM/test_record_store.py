@@ -0,0 +1,89 @@
+import csv
+import os
+import shutil
+
+from fraud_detector import PharmaFraudDetector
+from pdf_generator import generate_corpus
+from record_store import AMMRecordStore
+from result_cache import ResultCache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_import_is_incremental_and_lookups_return_typed_rows(tmp_path):
+    csv_path = str(tmp_path / 'amm.csv')
+    shutil.copy(os.path.join(HERE, 'pharma_amm_data.csv'), csv_path)
+    store = AMMRecordStore(str(tmp_path / 'records.db'))
+
+    assert store.import_csv(csv_path) == 1000
+    assert store.import_csv(csv_path) == 0
+
+    with open(csv_path, 'a') as f:
+        f.write("AMM-2023-5000,QuickHeal,CureAll,2023-02-01,2023-05-01,900,12,100000,40.50,8.10,0\n")
+    assert store.import_csv(csv_path) == 1
+    assert len(store) == 1001
+
+    record = store.get('AMM-2023-001')
+    assert record['manufacturer'] == 'PharmaCorp'
+    assert record['clinical_trial_participants'] == 561
+    assert record['price_per_unit'] == 214.2
+    assert store.get('AMM-2023-5000')['batch_size'] == 100000
+    assert store.get('AMM-0000-000') is None
+
+
+def test_blank_cells_are_imported_as_null(tmp_path):
+    csv_path = str(tmp_path / 'amm.csv')
+    with open(os.path.join(HERE, 'pharma_amm_data.csv')) as f:
+        header = f.readline()
+    with open(csv_path, 'w') as f:
+        f.write(header)
+        f.write("AMM-2023-5001,QuickHeal,,2023-02-01,2023-05-01,900,,100000,40.50,,0\n")
+    store = AMMRecordStore(str(tmp_path / 'records.db'))
+    store.import_csv(csv_path)
+
+    record = store.get('AMM-2023-5001')
+    assert record['manufacturer'] is None
+    assert record['reported_side_effects'] is None
+    assert record['production_cost'] is None
+    assert record['clinical_trial_participants'] == 900
+    assert record['price_per_unit'] == 40.5
+
+
+def test_append_on_a_fresh_store(tmp_path):
+    """The first call may be a write, which opens the database under the write lock"""
+    store = AMMRecordStore(str(tmp_path / 'records.db'))
+    store.append([{
+        'amm_number': 'AMM-2024-0001', 'product_name': 'CardioPlus', 'manufacturer': 'HealthGen',
+        'submission_date': '2024-01-10', 'approval_date': '2024-04-02',
+        'clinical_trial_participants': 1200, 'reported_side_effects': 30, 'batch_size': 150000,
+        'price_per_unit': 55.0, 'production_cost': 11.0
+    }])
+
+    assert store.get('AMM-2024-0001')['approval_date'] == '2024-04-02'
+
+
+def test_only_registry_results_are_cached(tmp_path):
+    corpus = str(tmp_path / 'corpus')
+    generate_corpus(1, corpus, seed=11)
+    with open(os.path.join(corpus, 'manifest.csv'), newline='') as f:
+        row = next(csv.DictReader(f))
+    records = AMMRecordStore(str(tmp_path / 'records.db'))
+    cache = ResultCache()
+    detector = PharmaFraudDetector(os.path.join(HERE, 'amm.joblib'), cache=cache, record_store=records)
+
+    def validate():
+        with open(os.path.join(corpus, row['filename']), 'rb') as f:
+            return detector.validate_pdf(f)
+
+    # No registry record yet: the dossier is random, so the verdict is not kept
+    assert validate()['extracted_data']['record_source'] == 'synthetic'
+    assert cache.stats()['memory_entries'] == 0
+
+    records.append([{name: row[name] for name in (
+        'amm_number', 'product_name', 'manufacturer', 'submission_date', 'approval_date',
+        'clinical_trial_participants', 'reported_side_effects', 'batch_size', 'price_per_unit', 'production_cost'
+    )}])
+    first = validate()
+    assert first['extracted_data']['record_source'] == 'registry'
+    assert validate() == first
+    assert cache.stats()['hits'] == 1
@@ -0,0 +1,56 @@
+import io
+
+from result_cache import ResultCache, sha256_stream
+
+
+def test_memory_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', {'status': 'VALID'})
+    cache.put('b', {'status': 'FRAUD'})
+    cache.get('a')
+    cache.put('c', {'status': 'VALID'})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {'status': 'VALID'}
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = ResultCache(ttl=-1)
+    cache.put('a', {'status': 'VALID'})
+
+    assert cache.get('a') is None
+
+
+def test_sqlite_store_survives_restart_and_is_bounded(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    cache = ResultCache(max_entries=1, db_path=db_path, max_db_entries=10)
+    for i in range(25):
+        cache.put(f'key{i}', {'probability': i / 100})
+
+    assert cache.stats()['disk_entries'] <= 10
+
+    reopened = ResultCache(db_path=db_path)
+    assert reopened.get('key24') == {'probability': 0.24}
+    assert reopened.get('key0') is None
+
+
+def test_sha256_stream_rewinds():
+    stream = io.BytesIO(b'%PDF-1.4 test')
+    digest = sha256_stream(stream)
+
+    assert stream.tell() == 0
+    assert digest == sha256_stream(io.BytesIO(b'%PDF-1.4 test'))
+
+
+def test_replacing_a_key_does_not_count_as_a_new_row(tmp_path):
+    cache = ResultCache(max_entries=1, db_path=str(tmp_path / 'cache.db'), max_db_entries=10)
+    for i in range(5):
+        cache.put('same', {'probability': i / 100})
+    for i in range(9):
+        cache.put(f'key{i}', {'probability': i / 100})
+
+    # 10 distinct keys fit exactly: nothing was evicted early
+    assert cache.stats()['disk_entries'] == 10
+    assert cache.get('same') == {'probability': 0.04}
+    assert cache.get('key0') == {'probability': 0.0}
@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+from fraud_detector import PharmaFraudDetector, score_csv
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_chunked_scoring_matches_predict_batch(tmp_path):
+    """Streaming in small chunks must give the same predictions as one in-memory batch"""
+    input_path = os.path.join(HERE, 'pharma_amm_data.csv')
+    output_path = str(tmp_path / 'scored.csv')
+    stats = score_csv(input_path, output_path, chunk_size=77, model_path=os.path.join(HERE, 'amm.joblib'))
+
+    records = pd.read_csv(input_path).to_dict('records')
+    expected = PharmaFraudDetector(os.path.join(HERE, 'amm.joblib')).predict_batch(records)
+    scored = pd.read_csv(output_path)
+
+    assert stats['rows'] == len(records) == len(scored)
+    assert list(scored['amm_number']) == [record['amm_number'] for record in records]
+    assert list(scored['predicted']) == [int(e['status'] == 'FRAUD') for e in expected]
+    assert list(scored['probability']) == [e['probability'] for e in expected]
+    assert list(scored['actual']) == [record['is_fraud'] for record in records]
+
+
+def test_gaps_are_filled_and_bad_rows_reported(tmp_path):
+    """Rows are filled like training data; a row that still cannot be scored gets an error, not an abort"""
+    df = pd.read_csv(os.path.join(HERE, 'pharma_amm_data.csv'), nrows=6)
+    df.loc[1, 'manufacturer'] = None
+    df.loc[2, 'batch_size'] = None
+    df.loc[3, 'production_cost'] = 0
+    df.loc[4, 'approval_date'] = 'unknown'
+    input_path = str(tmp_path / 'gaps.csv')
+    output_path = str(tmp_path / 'scored.csv')
+    df.to_csv(input_path, index=False)
+
+    detector = PharmaFraudDetector(os.path.join(HERE, 'amm.joblib'))
+    stats = score_csv(input_path, output_path, chunk_size=4, model_path=os.path.join(HERE, 'amm.joblib'))
+    scored = pd.read_csv(output_path, keep_default_na=False)
+
+    assert stats['rows'] == 6 and stats['errors'] == 2
+    assert list(scored['error'] != '') == [False, False, False, True, True, False]
+    assert 'price_to_cost_ratio' in scored['error'][3]
+    assert 'approval_time' in scored['error'][4]
+    assert list(scored['predicted'][3:5]) == ['', '']
+
+    filled = df.loc[[0, 1, 2, 5]].assign(manufacturer=df['manufacturer'].fillna('Unknown'),
+                                         batch_size=df['batch_size'].fillna(detector.median_batch))
+    expected = detector.predict_batch(filled.to_dict('records'))
+    assert [float(p) for p in scored['probability'][[0, 1, 2, 5]]] == [e['probability'] for e in expected]
@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+
+from fraud_detector import SELF_TEST_RECORD, PharmaFraudDetector
+from train import stream_sample, train
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(HERE, 'pharma_amm_data.csv')
+
+
+def test_stream_sample_matches_full_read():
+    full = pd.read_csv(DATA)
+    sample, median_batch, manufacturers, rows = stream_sample(DATA, max_rows=250, chunk_size=97)
+
+    assert rows == len(full)
+    assert len(sample) == 250
+    assert median_batch == full['batch_size'].median()
+    assert manufacturers == sorted(full['manufacturer'].fillna('Unknown').unique())
+
+
+def test_detector_uses_bundle_schema(tmp_path):
+    output = str(tmp_path / 'bundle.joblib')
+    result = train(DATA, output, n_estimators=10, n_jobs=1, max_rows=600, chunk_size=200)
+    detector = PharmaFraudDetector(output)
+
+    assert detector.model_version == result['version']
+    assert detector.features == list(detector.model.feature_names_in_)
+    assert detector.median_batch == pd.read_csv(DATA)['batch_size'].median()
+
+    fast = detector.predict_fast(SELF_TEST_RECORD)
+    assert fast == detector.predict(SELF_TEST_RECORD)
@@ -0,0 +1,211 @@
+# train.py
+# Command-line replacement for the training cells of amm.ipynb
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from feature_store import FeatureStore, median_from_counts
+from fraud_detector import BASE_FEATURES, engineer_features
+
+# Raw columns the model needs; everything else in the CSV is skipped while streaming
+TRAIN_COLUMNS = [
+    'manufacturer',
+    'submission_date',
+    'approval_date',
+    'clinical_trial_participants',
+    'reported_side_effects',
+    'batch_size',
+    'price_per_unit',
+    'production_cost',
+    'is_fraud'
+]
+
+
+def stream_sample(csv_path, max_rows=None, chunk_size=500_000, seed=42):
+    """One pass over a CSV of any size; returns (sample, median_batch, manufacturers, rows)
+
+    The sample is a uniform subsample of at most max_rows records: every row
+    draws a random key and the max_rows smallest keys survive each chunk.
+    median_batch and the manufacturer vocabulary are exact over the full file.
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    sample = None
+    batch_counts = None
+    manufacturers = set()
+    rows = 0
+
+    for chunk in pd.read_csv(csv_path, usecols=TRAIN_COLUMNS, chunksize=chunk_size):
+        rows += len(chunk)
+        chunk['manufacturer'] = chunk['manufacturer'].fillna('Unknown')
+        manufacturers.update(chunk['manufacturer'].unique())
+
+        # Batch sizes take few distinct values, so their counts stay small on any file size
+        counts = chunk['batch_size'].value_counts()
+        batch_counts = counts if batch_counts is None else batch_counts.add(counts, fill_value=0)
+
+        if max_rows:
+            chunk['_key'] = rng.random(len(chunk))
+            if sample is not None:
+                chunk = pd.concat([sample, chunk], ignore_index=True)
+            sample = chunk.nsmallest(max_rows, '_key') if len(chunk) > max_rows else chunk
+        else:
+            sample = chunk if sample is None else pd.concat([sample, chunk], ignore_index=True)
+
+    if sample is None:
+        raise ValueError(f"No rows in {csv_path}")
+
+    # Median of the non-missing batch sizes, as df['batch_size'].median() gives
+    median_batch = median_from_counts(batch_counts)
+
+    sample = sample.drop(columns='_key', errors='ignore').reset_index(drop=True)
+    sample['batch_size'] = sample['batch_size'].fillna(median_batch)
+    return sample, median_batch, sorted(manufacturers), rows
+
+
+def bundle_version(model, schema):
+    """Short hash of the fitted trees and the schema they expect"""
+    digest = hashlib.sha256(pickle.dumps(model, protocol=pickle.HIGHEST_PROTOCOL))
+    digest.update(json.dumps(schema, sort_keys=True).encode())
+    return digest.hexdigest()[:12]
+
+
+def train(csv_path, output='amm_model.joblib', n_estimators=100, n_jobs=-1, max_rows=None,
+          chunk_size=500_000, test_size=0.3, seed=42):
+    """Fit the fraud model on a streamed sample and save it with its schema; returns a report"""
+    start = time.perf_counter()
+    df, median_batch, manufacturers, rows = stream_sample(csv_path, max_rows, chunk_size, seed)
+    load_seconds = time.perf_counter() - start
+
+    df = engineer_features(df, median_batch, manufacturers)
+    features = BASE_FEATURES + [f'manufacturer_{mfg}' for mfg in manufacturers]
+    schema = {'features': features, 'manufacturers': manufacturers, 'median_batch': median_batch}
+    return _fit_and_save(df[features], df['is_fraud'], schema, rows, load_seconds, output,
+                         n_estimators, n_jobs, test_size, seed)
+
+
+def train_from_store(store_path, output='amm_model.joblib', n_estimators=100, n_jobs=-1, max_rows=None,
+                     test_size=0.3, seed=42):
+    """Fit the fraud model on the features of a feature_store.py store, without reading any CSV"""
+    import pandas as pd
+
+    start = time.perf_counter()
+    store = FeatureStore(store_path)
+    if 'is_fraud' not in store.meta['columns']:
+        raise ValueError(f"{store_path} holds no is_fraud labels")
+    rows = len(store)
+    if not rows:
+        raise ValueError(f"No rows in {store_path}")
+    X, y = store.matrix(), store.labels().astype(int)
+    if max_rows and rows > max_rows:
+        keep = np.sort(np.random.default_rng(seed).choice(rows, max_rows, replace=False))
+        X, y = X[keep], y[keep]
+    X = pd.DataFrame(X, columns=store.schema['features'])
+    load_seconds = time.perf_counter() - start
+
+    return _fit_and_save(X, pd.Series(y, name='is_fraud'), store.schema, rows, load_seconds, output,
+                         n_estimators, n_jobs, test_size, seed)
+
+
+def _fit_and_save(X, y, schema, rows, load_seconds, output, n_estimators, n_jobs, test_size, seed):
+    """Fit on a train split of (X, y), save the bundle and report on the test split
+
+    Rows with missing or infinite features are skipped: serving rejects them
+    ("Missing or invalid features"), so the model never learns from them either.
+    """
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import classification_report, roc_auc_score
+    from sklearn.model_selection import train_test_split
+
+    valid = np.isfinite(X.to_numpy(dtype=float)).all(axis=1)
+    skipped = int((~valid).sum())
+    if skipped:
+        X, y = X[valid], y[valid]
+    if not len(X):
+        raise ValueError("No row has a complete set of features")
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=seed)
+
+    model = RandomForestClassifier(
+        n_estimators=n_estimators,
+        random_state=seed,
+        class_weight='balanced',  # Handles imbalanced data
+        n_jobs=n_jobs
+    )
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+
+    y_proba = model.predict_proba(X_test)[:, 1]
+    y_pred = model.classes_[(y_proba > 0.5).astype(int)]
+    # The serving process picks its own parallelism
+    model.n_jobs = None
+
+    version = bundle_version(model, schema)
+    joblib.dump({
+        'model': model,
+        **schema,
+        'version': version,
+        'trained_at': datetime.now().isoformat(timespec='seconds'),
+        'rows_seen': rows,
+        'rows_trained': len(X_train)
+    }, output, compress=3)
+
+    return {
+        'output': output,
+        'version': version,
+        'rows_seen': rows,
+        'rows_sampled': len(X) + skipped,
+        'rows_skipped': skipped,
+        'load_seconds': load_seconds,
+        'fit_seconds': fit_seconds,
+        'artifact_bytes': os.path.getsize(output),
+        'auc': roc_auc_score(y_test, y_proba) if y_test.nunique() > 1 else None,
+        'report': classification_report(y_test, y_pred, zero_division=0)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the AMM fraud model from a pharma_amm_data.csv-shaped file")
+    parser.add_argument('csv_path', nargs='?', default='pharma_amm_data.csv')
+    parser.add_argument('--output', default='amm_model.joblib', help="Bundle with the model and its schema")
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="Cores used to fit trees (-1 = all)")
+    parser.add_argument('--max-rows', type=int, help="Train on a uniform sample of at most this many rows")
+    parser.add_argument('--chunk-size', type=int, default=500_000, help="Rows read per chunk while streaming")
+    parser.add_argument('--test-size', type=float, default=0.3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--features', metavar='STORE',
+                        help="Train on a feature_store.py store instead of parsing csv_path")
+    args = parser.parse_args()
+
+    try:
+        if args.features:
+            result = train_from_store(args.features, args.output, args.n_estimators, args.n_jobs,
+                                      args.max_rows, args.test_size, args.seed)
+        else:
+            result = train(args.csv_path, args.output, args.n_estimators, args.n_jobs, args.max_rows,
+                           args.chunk_size, args.test_size, args.seed)
+    except Exception as e:
+        print(f"\n❌ Training failed: {str(e)}")
+        sys.exit(1)
+
+    print("\nClassification Report:")
+    print(result['report'])
+    if result['auc'] is not None:
+        print(f"AUC-ROC Score: {result['auc']:.4f}")
+    print(f"\n📊 Read {result['rows_seen']} rows, trained on a sample of {result['rows_sampled']} "
+          f"(read {result['load_seconds']:.1f}s, fit {result['fit_seconds']:.1f}s)")
+    if result['rows_skipped']:
+        print(f"⚠️ Skipped {result['rows_skipped']} rows with missing or invalid features")
+    print(f"✅ Model {result['version']} saved to {result['output']} "
+          f"({result['artifact_bytes'] / 1024:.1f} KiB)")